@@ -0,0 +1,172 @@
+"""
+Сравнение загрузки страниц эксель файла расписания в полном и потоковом режимах и поиска значений
+объединённых клеток перебором диапазонов и через индекс SheetGrid.
+
+Без аргументов создаёт файл, похожий на расписание лицея: две страницы с оформлением всех клеток
+и объединёнными клетками уроков. С путём к файлу расписания вида ДД.ММ.xlsx дополнительно сравнивает
+полный парсинг этого файла в обоих режимах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.parse_workbook [путь к файлу] [--rows 200] [--repeat 3]
+"""
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.cell.cell import MergedCell
+
+from bot.misc.grid import GRID_MAX_COL, GRID_MAX_ROW, SheetGrid, load_sheet_grids
+from bot.misc.parsing import Parser
+
+from typing import Any, Callable, Dict, Tuple
+from io import BytesIO
+
+import argparse
+import openpyxl
+import os
+import time
+import tracemalloc
+
+
+def build_workbook(rows: int) -> bytes:
+    """
+    Создаёт эксель файл из двух страниц, в которых все клетки оформлены, а уроки занимают
+    объединённые блоки из двух строк и двух столбцов.
+
+    Аргументы:
+        rows (int): Количество строк на странице.
+
+    Возвращает:
+        bytes: Содержимое файла.
+    """
+    workbook = openpyxl.Workbook()
+    side = Side(style='thin')
+    border, fill = Border(left=side, right=side, top=side, bottom=side), PatternFill('solid', fgColor='DDEBF7')
+    font, alignment = Font(name='Times New Roman', size=11, bold=True), Alignment(wrap_text=True, vertical='center')
+    for index, title in enumerate(('10', '11')):
+        sheet = workbook.active if index == 0 else workbook.create_sheet(title)
+        sheet.title = title
+        for row in range(1, rows + 1):
+            for col in range(1, 61):
+                cell = sheet.cell(row, col)
+                cell.border, cell.fill, cell.font, cell.alignment = border, fill, font, alignment
+        for row in range(2, rows, 2):
+            for col in range(2, 60, 2):
+                sheet.cell(row, col, f'{row // 2} урок\nкаб. {col}')
+                sheet.merge_cells(start_row=row, start_column=col, end_row=row + 1, end_column=col + 1)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Tuple[float, float]:
+    """
+    Измеряет лучшее время выполнения функции и пиковый объём выделенной ею памяти.
+
+    Аргументы:
+        function (Callable[[], Any]): Измеряемая функция.
+        repeat (int): Количество запусков для замера времени.
+
+    Возвращает:
+        Tuple[float, float]: Время в секундах и пиковая память в мегабайтах.
+    """
+    best = min(timed(function) for _ in range(repeat))
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 2 ** 20
+
+
+def timed(function: Callable[[], Any]) -> float:
+    """
+    Возвращает время одного выполнения функции в секундах.
+    """
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def values_by_scan(sheet) -> Dict[Tuple[int, int], Any]:
+    """
+    Находит значения клеток области расписания так, как это делалось до индекса объединённых клеток:
+    для каждой объединённой клетки перебираются все объединённые диапазоны страницы.
+
+    Аргументы:
+        sheet (Worksheet): Страница, загруженная в полном режиме.
+
+    Возвращает:
+        Dict[Tuple[int, int], Any]: Непустые значения клеток по их строке и столбцу.
+    """
+    values = {}
+    for row in sheet.iter_rows(min_row=1, max_row=GRID_MAX_ROW, max_col=GRID_MAX_COL):
+        for cell in row:
+            value = cell.value
+            if isinstance(cell, MergedCell):
+                for merged in sheet.merged_cells.ranges:
+                    if cell.coordinate in merged:
+                        value = sheet.cell(merged.min_row, merged.min_col).value
+                        break
+            if value is not None:
+                values[cell.row, cell.column] = value
+    return values
+
+
+def values_by_index(sheet) -> Dict[Tuple[int, int], Any]:
+    """
+    Находит значения клеток области расписания через SheetGrid, который один раз переносит значения
+    объединённых диапазонов в их клетки.
+
+    Аргументы:
+        sheet (Worksheet): Страница, загруженная в полном режиме.
+
+    Возвращает:
+        Dict[Tuple[int, int], Any]: Непустые значения клеток по их строке и столбцу.
+    """
+    rows = sheet.iter_rows(min_row=1, max_row=GRID_MAX_ROW, max_col=GRID_MAX_COL, values_only=True)
+    return SheetGrid.from_rows(sheet.title, rows, [merged.bounds for merged in sheet.merged_cells.ranges]).values
+
+
+def report(title: str, results: Dict[str, Tuple[float, float]]) -> None:
+    """
+    Выводит время и память каждого варианта и их отношение к первому варианту.
+    """
+    print(title)
+    base_time, base_memory = next(iter(results.values()))
+    for label, (seconds, memory) in results.items():
+        print(f'  {label}: {seconds * 1000:.1f} мс ({base_time / seconds:.1f}x), '
+              f'пик памяти {memory:.1f} МБ ({base_memory / max(memory, 1e-9):.1f}x)')
+
+
+def main() -> None:
+    """
+    Создаёт или читает файл расписания и выводит результаты сравнений.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', help='файл расписания вида ДД.ММ.xlsx')
+    parser.add_argument('--rows', type=int, default=200, help='количество строк создаваемых страниц')
+    parser.add_argument('--repeat', type=int, default=3, help='количество запусков для замера времени')
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, 'rb') as file:
+            content = file.read()
+    else:
+        content = build_workbook(args.rows)
+    print(f'размер файла: {len(content) / 2 ** 20:.1f} МБ')
+
+    report('загрузка областей страниц', {
+        'полный режим': measure(lambda: load_sheet_grids(content, read_only=False), args.repeat),
+        'потоковый режим': measure(lambda: load_sheet_grids(content, read_only=True), args.repeat)})
+
+    workbook = openpyxl.load_workbook(BytesIO(content))
+    report('значения объединённых клеток в полном режиме', {
+        'перебор диапазонов': measure(lambda: [values_by_scan(sheet) for sheet in workbook.worksheets], args.repeat),
+        'индекс SheetGrid': measure(lambda: [values_by_index(sheet) for sheet in workbook.worksheets], args.repeat)})
+
+    if args.path:
+        filename = os.path.basename(args.path)
+        report('парсинг файла расписания', {
+            'полный режим': measure(lambda: Parser(filename, content, read_only=False).parse_lessons(), args.repeat),
+            'потоковый режим': measure(lambda: Parser(filename, content).parse_lessons(), args.repeat)})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Сравнение планов и времени выполнения горячих запросов бота к PostgreSQL без вторичных индексов и с ними.
+
+Заполняет пустую бд, созданную миграциями (alembic upgrade head), расписаниями за год с двумя версиями
+на каждый день и пользователями, выполняет EXPLAIN ANALYZE каждого запроса в транзакции с удалёнными
+индексами, которая затем откатывается, и с индексами, после чего удаляет добавленные данные.
+
+Запуск из корня репозитория на отдельной бд, указанной в .env:
+    python -m benchmarks.query_plans [--users 5000] [--verbose]
+"""
+from sqlalchemy import Connection, create_engine, select, text
+
+from bot.db.models import User
+from bot.db.requests import _month_start, _user_schedule_query
+from bot.config import load_sync_db_URL
+
+from datetime import date, timedelta
+from typing import Iterator, List
+
+import argparse
+import json
+
+
+CLASSES = ['10 А', '10 Б', '10 В', '10 Г', '11 А', '11 Б', '11 В', '11 Г']
+
+# Вторичные индексы, с которыми и без которых сравниваются запросы
+INDEXES = ['ix_regular_schedule_version_class', 'ix_uday_schedule_version_group', 'ix_users_class_letter']
+
+SEEDED_TABLES = 'rendered_schedules, published_schedules, regular_schedule, uday_schedule, schedule_versions, users'
+
+
+def seed(connection: Connection, first_day: date, last_day: date, users: int) -> None:
+    """
+    Создаёт партиции и заполняет бд расписаниями с first_day по last_day и пользователями.
+
+    Аргументы:
+        connection (Connection): Соединение с бд.
+        first_day (date): Первая дата расписаний.
+        last_day (date): Последняя дата расписаний.
+        users (int): Количество пользователей.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    start = _month_start(first_day)
+    while start <= last_day:
+        end = _month_start(start, 1)
+        for table in ('regular_schedule', 'uday_schedule'):
+            connection.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_y{start.year}m{start.month:02} "
+                                    f"PARTITION OF {table} FOR VALUES FROM ('{start}') TO ('{end}')"))
+        start = end
+
+    # Две версии на каждый день: устаревшая повторная загрузка и опубликованная
+    connection.execute(text("INSERT INTO schedule_versions (date) SELECT day::date "
+                            "FROM generate_series(CAST(:first AS date), CAST(:last AS date), interval '1 day') day, "
+                            "generate_series(1, 2)"), {'first': first_day, 'last': last_day})
+    connection.execute(text('INSERT INTO published_schedules (date, version_id) '
+                            'SELECT date, MAX(id) FROM schedule_versions GROUP BY date'))
+    connection.execute(text("INSERT INTO regular_schedule (lesson_number, lesson_info, date, version_id, "
+                            "class_letter, class_group) "
+                            "SELECT num, 'урок ' || num, versions.date, versions.id, letter, class_group "
+                            "FROM schedule_versions versions, unnest(CAST(:classes AS varchar[])) letter, "
+                            "generate_series(0, 2) class_group, generate_series(1, 8) num"), {'classes': CLASSES})
+    connection.execute(text("INSERT INTO uday_schedule (lesson_number, lesson_info, date, version_id, uday_group) "
+                            "SELECT num, 'пара ' || num, versions.date, versions.id, uday_group "
+                            "FROM schedule_versions versions, generate_series(1, 10) uday_group, "
+                            "generate_series(1, 6) num"))
+    connection.execute(text('INSERT INTO users (id, class_letter, class_group, uday_group) '
+                            'SELECT id, (CAST(:classes AS varchar[]))[1 + id % 8], 1 + id % 2, 1 + id % 10 '
+                            'FROM generate_series(1, :users) id'), {'classes': CLASSES, 'users': users})
+    connection.commit()
+    connection.execute(text('ANALYZE'))
+    connection.commit()
+
+
+def queries(regular_day: date, uday: date) -> Iterator[tuple]:
+    """
+    Возвращает горячие запросы бота с параметрами.
+
+    Аргументы:
+        regular_day (date): Обычный учебный день.
+        uday (date): Универ-день 10-х классов.
+
+    Возвращает:
+        Iterator[tuple]: Название запроса, запрос SQLAlchemy и параметры.
+    """
+    yield ('get_user_schedule, обычный день', _user_schedule_query,
+           {'date': regular_day, 'letter': '10 А', 'group': 1, 'uday_group': None})
+    yield ('get_user_schedule, универ-день', _user_schedule_query,
+           {'date': uday, 'letter': '10 А', 'group': 0, 'uday_group': 3})
+    yield ('get_users_page по номеру класса',
+           select(User.id).filter(User.class_letter.startswith('10'), User.id > 1000).order_by(User.id).limit(500), {})
+    yield ('get_user_profiles_page по классам',
+           select(User.id, User.class_letter, User.class_group, User.uday_group)
+           .where(User.class_letter.in_(['10 А', '11 Б'])).order_by(User.id).limit(500), {})
+
+
+def plan_nodes(plan: dict) -> List[str]:
+    """
+    Перечисляет узлы плана запроса с названиями индексов или таблиц.
+
+    Аргументы:
+        plan (dict): Узел плана из EXPLAIN (FORMAT JSON).
+
+    Возвращает:
+        List[str]: Описания узлов плана.
+    """
+    target = plan.get('Index Name') or plan.get('Relation Name')
+    nodes = [f"{plan['Node Type']} ({target})" if target else plan['Node Type']]
+    for child in plan.get('Plans', []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain(connection: Connection, query, params: dict) -> dict:
+    """
+    Выполняет EXPLAIN ANALYZE запроса.
+
+    Аргументы:
+        connection (Connection): Соединение с бд.
+        query: Запрос SQLAlchemy.
+        params (dict): Значения параметров запроса.
+
+    Возвращает:
+        dict: Корень плана из EXPLAIN (FORMAT JSON) вместе со временем выполнения.
+    """
+    compiled = query.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+    result = connection.exec_driver_sql(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {compiled}',
+                                        {**compiled.params, **params}).scalar()
+    return (json.loads(result) if isinstance(result, str) else result)[0]
+
+
+def main() -> None:
+    """
+    Заполняет бд, выводит время выполнения и число прочитанных страниц каждого запроса без индексов
+    и с индексами и удаляет добавленные данные.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5000, help='количество пользователей')
+    parser.add_argument('--verbose', action='store_true', help='выводить узлы планов')
+    args = parser.parse_args()
+
+    engine = create_engine(load_sync_db_URL())
+    last_day = date.today()
+    first_day = last_day - timedelta(days=365)
+    regular_day = last_day - timedelta(days=(last_day.weekday() - 1) % 7 + 7)
+    uday = regular_day - timedelta(days=1)
+
+    with engine.connect() as connection:
+        seeded = text('SELECT EXISTS (SELECT 1 FROM users) OR EXISTS (SELECT 1 FROM schedule_versions)')
+        if connection.execute(seeded).scalar():
+            raise SystemExit('бд не пустая, запустите сравнение на отдельной бд')
+        seed(connection, first_day, last_day, args.users)
+        try:
+            for name, query, params in queries(regular_day, uday):
+                plans = {}
+
+                # Индексы удаляются только внутри транзакции, которая затем откатывается
+                transaction = connection.begin()
+                try:
+                    for index in INDEXES:
+                        connection.execute(text(f'DROP INDEX {index}'))
+                    plans['без индексов'] = explain(connection, query, params)
+                finally:
+                    transaction.rollback()
+                plans['с индексами'] = explain(connection, query, params)
+                connection.rollback()
+
+                print(name)
+                for label, plan in plans.items():
+                    pages = plan['Plan'].get('Shared Hit Blocks', 0) + plan['Plan'].get('Shared Read Blocks', 0)
+                    print(f"  {label}: {plan['Execution Time']:.3f} мс, прочитано страниц {pages}")
+                    if args.verbose:
+                        print('    ' + ' -> '.join(plan_nodes(plan['Plan'])))
+        finally:
+            connection.rollback()
+            connection.execute(text(f'TRUNCATE {SEEDED_TABLES} RESTART IDENTITY'))
+            connection.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,18 @@
 from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
-
-from bot.db.requests import get_admins, check_schedule_existence
-from bot.misc.parsing import parse_schedule_from_eljur
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from bot.db.requests import get_admins, check_schedule_existence, refresh_admins, refresh_published_dates
+from bot.db.requests import create_schedule_partitions, delete_old_schedules, drop_schedule_partitions
+from bot.db.database import warm_up_engine, dispose_engines
+from bot.db.cache import admins_ids
+from bot.db.broker import listen_invalidations, close_redis, acquire_job_lock
+from bot.misc.parsing import parse_schedule_from_eljur, shutdown_parsing_executor
 from bot.create_bot import bot, dp
+from bot.config import TIMEZONE, local_today, load_webhook_settings
 
 from cachetools import TTLCache
-
-from dotenv import dotenv_values
-
+from typing import Any, Awaitable, Callable
+from aiohttp import web
 
 import datetime as dt
 
@@ -21,7 +26,9 @@ errors_cache = TTLCache(maxsize=30, ttl=120)
 
 async def start_bot() -> None:
     """
-    Уведомляет админов и разработчиков о запуске бота, вызывает функцию запуска бота.
+    Прогревает пул соединений с бд, загружает в память идентификаторы админов и разработчиков и даты
+    опубликованных расписаний, уведомляет админов и разработчиков о запуске бота, вызывает функцию
+    запуска бота, а при его остановке останавливает пул парсинга и закрывает соединения с бд и Redis.
 
     Принимает:
         None: функция ничего не принимает.
@@ -29,24 +36,79 @@ async def start_bot() -> None:
     Возвращает:
         None: функция ничего не возвращает.
     """
-    env_vars = dotenv_values(".env")
-    devs_ids = list(map(int, env_vars['DEVELOPERS_IDS'].split(',')))
-    admins_ids = await get_admins()
-    admins_and_devs = set(admins_ids + devs_ids)
-    for id in admins_and_devs:
+    await warm_up_engine()
+    await run_once(maintain_schedule_storage)
+    await refresh_memory_data()
+    for id in set(admins_ids):
         try:
             await bot.send_message(chat_id=id, text='бот запущен 🚀')
         except (TelegramForbiddenError, TelegramBadRequest):
             pass
 
+    # Получение сообщений об инвалидации кэшей от остальных процессов бота
+    listener = asyncio.create_task(listen_invalidations(on_reconnect=refresh_memory_data))
+
     # Запуск бота
-    await main()
+    try:
+        await main()
+    finally:
+        listener.cancel()
+        shutdown_parsing_executor()
+        await close_redis()
+        await dispose_engines()
+
+
+async def refresh_memory_data() -> None:
+    """
+    Загружает из бд в память идентификаторы админов и разработчиков и даты опубликованных расписаний.
+
+    Принимает:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    await refresh_admins()
+    await refresh_published_dates()
+
+
+async def run_once(job: Callable[[], Awaitable[Any]]) -> None:
+    """
+    Выполняет задачу, если её запуск не закреплён за другим процессом бота, чтобы загрузка расписания,
+    рассылка и обслуживание бд выполнялись одним процессом.
+
+    Принимает:
+        job (Callable[[], Awaitable[Any]]): Асинхронная функция задачи.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    if await acquire_job_lock(job.__name__):
+        await job()
+
+
+async def maintain_schedule_storage() -> None:
+    """
+    Создаёт партиции таблиц расписаний на текущий и следующие месяцы, удаляет устаревшие
+    расписания и полностью устаревшие партиции.
+
+    Принимает:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    today = local_today()
+    old_date = today - dt.timedelta(days=2)
+    await create_schedule_partitions(today)
+    await delete_old_schedules(old_date)
+    await drop_schedule_partitions(old_date)
 
 
 async def parse_schedule():
-    today = dt.date.today()
+    today = local_today()
     tomorrow = today + dt.timedelta(days=1)
-    schedule_existence = await check_schedule_existence(today, tomorrow)
+    schedule_existence = check_schedule_existence(today, tomorrow)
     if not schedule_existence[1]:
         message = 'Расписание на завтра было успешно звгружено!' if await parse_schedule_from_eljur(today, tomorrow, bot) else 'Произошла ошибка при попытке спарсить расписание!'
         for id in await get_admins():
@@ -55,7 +117,8 @@ async def parse_schedule():
 
 async def main() -> None:
     """
-    Настраивает логгирование, запускает бота, в случае ошибки перезапускает бота и логгирует ошибку.
+    Настраивает логгирование и планировщик задач, запускает бота через вебхук, если он настроен,
+    иначе через long polling, в случае ошибки перезапускает бота и логгирует ошибку.
 
     Принимает:
         None: функция ничего не принимает.
@@ -63,12 +126,23 @@ async def main() -> None:
     Возвращает:
         None: функция ничего не возвращает.
     """
-    scheduler = AsyncIOScheduler(timezone='Asia/Krasnoyarsk')
-    scheduler.add_job(parse_schedule, 'cron', hour='11-21/1')
+    # Загрузка расписания и обслуживание бд выполняются одним из процессов бота,
+    # данные в памяти обновляет каждый процесс
+    scheduler = AsyncIOScheduler(timezone=TIMEZONE)
+    scheduler.add_job(run_once, 'cron', hour='11-21/1', args=[parse_schedule])
+    scheduler.add_job(refresh_published_dates, 'cron', hour=0, minute=0)
+    scheduler.add_job(run_once, 'cron', hour=0, minute=5, args=[maintain_schedule_storage])
+    scheduler.add_job(refresh_admins, 'interval', minutes=10)
     scheduler.start()
     logs_format = '%(asctime)s - %(filename)s:%(lineno)d - %(message)s'
     logging.basicConfig(level=logging.ERROR, filename='logs.log', filemode='w', format=logs_format)
 
+    webhook = load_webhook_settings()
+    if webhook is not None:
+        await run_webhook(webhook)
+        return
+
+    # Long polling с одним токеном возможен только в одном процессе бота
     while True:
         try:
             await bot.delete_webhook(drop_pending_updates=True)
@@ -81,5 +155,29 @@ async def main() -> None:
                 logging.error(ex)
 
 
+async def run_webhook(settings: dict) -> None:
+    """
+    Запускает веб-сервер, принимающий обновления через вебхук, и регистрирует вебхук в Telegram.
+    Несколько процессов бота за балансировщиком нагрузки регистрируют один и тот же вебхук.
+
+    Принимает:
+        settings (dict): Настройки вебхука из load_webhook_settings.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=settings['secret']).register(app, path=settings['path'])
+    setup_application(app, dp, bot=bot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=settings['host'], port=settings['port']).start()
+    await bot.set_webhook(url=settings['url'], secret_token=settings['secret'])
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
 if __name__ == '__main__':
     asyncio.run(start_bot())
@@ -1,5 +1,14 @@
 from dotenv import dotenv_values
 
+from zoneinfo import ZoneInfo
+from typing import List
+
+import datetime as dt
+
+
+# Часовой пояс лицея, в котором считаются даты расписаний и работает планировщик
+TIMEZONE = 'Asia/Krasnoyarsk'
+
 
 def load_db_URL() -> str:
     """
@@ -18,4 +27,173 @@ def load_db_URL() -> str:
     db_host = env_vars['DB_HOST']
     db_port = env_vars['DB_PORT']
     return (f"://{db_user}:{db_password}@"
-            f"{db_host}:{db_port}/{database}")
\ No newline at end of file
+            f"{db_host}:{db_port}/{database}")
+
+
+def is_sqlite_backend() -> bool:
+    """
+    Функция проверки, выбрана ли в переменных окружения встроенная бд SQLite вместо PostgreSQL.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        bool: True, если DB_BACKEND равен sqlite, иначе False.
+    """
+    return (dotenv_values(".env").get('DB_BACKEND') or 'postgresql').lower() == 'sqlite'
+
+
+def load_async_db_URL() -> str:
+    """
+    Функция составления URL базы данных для асинхронного движка в соответствии с выбранной бд.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        str: URL базы данных с драйвером aiosqlite или asyncpg.
+    """
+    if is_sqlite_backend():
+        return f"sqlite+aiosqlite:///{dotenv_values('.env').get('SQLITE_PATH') or 'bot.db'}"
+    return f'postgresql+asyncpg{load_db_URL()}'
+
+
+def load_sync_db_URL() -> str:
+    """
+    Функция составления URL базы данных для синхронного движка в соответствии с выбранной бд.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        str: URL базы данных с драйвером pysqlite или psycopg2.
+    """
+    if is_sqlite_backend():
+        return f"sqlite:///{dotenv_values('.env').get('SQLITE_PATH') or 'bot.db'}"
+    return f'postgresql+psycopg2{load_db_URL()}'
+
+
+def load_replica_db_URL() -> str | None:
+    """
+    Функция получения данных о реплике бд только для чтения из переменных окружения и составления
+    из них шаблона URL реплики. Пользователь, пароль и имя базы данных совпадают с основной бд.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        str | None: шаблон URL реплики или None, если реплика не настроена или выбрана SQLite.
+    """
+    env_vars = dotenv_values(".env")
+    replica_host = env_vars.get('DB_REPLICA_HOST')
+    if not replica_host or is_sqlite_backend():
+        return None
+    replica_port = env_vars.get('DB_REPLICA_PORT') or env_vars['DB_PORT']
+    return (f"://{env_vars['DB_USER']}:{env_vars['DB_PASSWORD']}@"
+            f"{replica_host}:{replica_port}/{env_vars['DATABASE']}")
+
+
+def load_replica_lag_window() -> float:
+    """
+    Функция получения из переменных окружения времени, в течение которого чтения данных
+    пользователя после их изменения выполняются на основной бд, а не на реплике.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        float: время в секундах.
+    """
+    return float(dotenv_values(".env").get('DB_REPLICA_LAG_WINDOW') or 5)
+
+
+def load_pool_settings() -> dict:
+    """
+    Функция получения настроек пула соединений с бд из переменных окружения.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        dict: размер пула, допустимое переполнение пула и время жизни соединения в секундах.
+    """
+    env_vars = dotenv_values(".env")
+    return {'pool_size': int(env_vars.get('DB_POOL_SIZE') or 10),
+            'max_overflow': int(env_vars.get('DB_MAX_OVERFLOW') or 5),
+            'pool_recycle': int(env_vars.get('DB_POOL_RECYCLE') or 1800)}
+
+
+def load_slow_query_threshold() -> float:
+    """
+    Функция получения из переменных окружения порога длительности запроса к бд, начиная с которого
+    запрос считается медленным и логируется.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        float: порог в миллисекундах.
+    """
+    return float(dotenv_values(".env").get('DB_SLOW_QUERY_MS') or 500)
+
+
+def load_developers_ids() -> List[int]:
+    """
+    Функция получения Telegram ID разработчиков из переменных окружения.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        List[int]: список идентификаторов разработчиков.
+    """
+    return list(map(int, dotenv_values(".env")['DEVELOPERS_IDS'].split(',')))
+
+
+def local_today() -> dt.date:
+    """
+    Функция получения текущей даты в часовом поясе лицея.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        date: текущая дата.
+    """
+    return dt.datetime.now(ZoneInfo(TIMEZONE)).date()
+
+
+def load_redis_URL() -> str | None:
+    """
+    Функция получения из переменных окружения URL Redis, общего для нескольких процессов бота
+    хранилища состояний, счётчиков ограничения частоты запросов и сообщений об инвалидации кэшей.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        str | None: URL Redis или None, если Redis не настроен и бот работает в одном процессе.
+    """
+    return dotenv_values(".env").get('REDIS_URL') or None
+
+
+def load_webhook_settings() -> dict | None:
+    """
+    Функция получения из переменных окружения настроек приёма обновлений через вебхук. В отличие от
+    long polling, в режиме вебхука можно запускать несколько процессов бота с одним токеном.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        dict | None: публичный URL вебхука, путь, адрес и порт веб-сервера и секретный токен
+                     или None, если WEBHOOK_URL не задан и бот получает обновления через long polling.
+    """
+    env_vars = dotenv_values(".env")
+    if not env_vars.get('WEBHOOK_URL'):
+        return None
+    path = env_vars.get('WEBHOOK_PATH') or '/webhook'
+    return {'url': f"{env_vars['WEBHOOK_URL'].rstrip('/')}{path}", 'path': path,
+            'host': env_vars.get('WEBAPP_HOST') or '0.0.0.0',
+            'port': int(env_vars.get('WEBAPP_PORT') or 8080),
+            'secret': env_vars.get('WEBHOOK_SECRET') or None}
@@ -1,15 +1,21 @@
 from bot.handlers import registration_callbacks, main_handlers, admin_panel, developer_panel
 
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
 from aiogram import Bot, Dispatcher
 
+from bot.db.broker import get_redis
+
 from dotenv import dotenv_values
 
 
 # Создаём экземпляры бота и диспетчера
 env_vars = dotenv_values(".env")
 bot = Bot(env_vars['BOT_TOKEN'])
-storage = MemoryStorage()
+
+# Если задан REDIS_URL, храним состояния в Redis, чтобы их видели все процессы бота
+redis = get_redis()
+storage = RedisStorage(redis) if redis is not None else MemoryStorage()
 dp = Dispatcher(storage=storage)
 dp.include_routers(developer_panel.router, admin_panel.router, registration_callbacks.router,
                    main_handlers.router)
@@ -0,0 +1,202 @@
+from redis.asyncio import Redis
+
+from bot.config import load_redis_URL
+
+from .cache import users_cache, schedules_cache, admins_ids, published_dates
+from .database import mark_recent_write
+
+from typing import Any, Awaitable, Callable
+from datetime import date
+
+import asyncio
+import logging
+import uuid
+
+
+# Канал Redis для сообщений об инвалидации кэшей между процессами бота
+INVALIDATION_CHANNEL = 'bot:invalidations'
+
+# Задержка в секундах перед повторной подпиской после разрыва соединения с Redis
+LISTEN_RETRY_DELAY = 5
+
+# Время в секундах, на которое запуск задачи планировщика закрепляется за одним процессом
+JOB_LOCK_TTL = 600
+
+# Идентификатор процесса, чтобы не применять повторно собственные сообщения
+_instance_id = uuid.uuid4().hex
+
+_redis: Redis | None = None
+
+
+def get_redis() -> Redis | None:
+    """
+    Возвращает общий клиент Redis, создавая его при первом обращении.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        Redis | None: Клиент Redis или None, если REDIS_URL не задан.
+    """
+    global _redis
+    if _redis is None:
+        redis_url = load_redis_URL()
+        if redis_url is None:
+            return None
+        _redis = Redis.from_url(redis_url)
+    return _redis
+
+
+def set_redis(client: Redis | None) -> None:
+    """
+    Подменяет общий клиент Redis, например на экземпляр fakeredis.
+
+    Аргументы:
+        client (Redis | None): Клиент Redis или None для работы без Redis.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    global _redis
+    _redis = client
+
+
+async def close_redis() -> None:
+    """
+    Закрывает соединения общего клиента Redis при остановке бота.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+    _redis = None
+
+
+def apply_invalidation(kind: str, value: str) -> None:
+    """
+    Применяет сообщение об инвалидации к кэшам текущего процесса.
+
+    Аргументы:
+        kind (str): Тип изменения: user - изменён пользователь, admin - добавлен или удалён админ,
+                    published - опубликовано расписание, deleted - удалены расписания до даты включительно.
+        value (str): Telegram ID пользователей через запятую, действие с админом и его Telegram ID
+                     в виде add:ID или remove:ID, или дата в формате ISO.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    if kind == 'user':
+        # Реплика может ещё не получить изменения, поэтому пользователи пока читаются с основной бд
+        for tg_id in map(int, value.split(',')):
+            mark_recent_write(tg_id)
+            users_cache.invalidate(tg_id)
+    elif kind == 'admin':
+        action, tg_id = value.split(':')
+        if action == 'add':
+            admins_ids.add(int(tg_id))
+        else:
+            admins_ids.discard(int(tg_id))
+    elif kind == 'published':
+        day = date.fromisoformat(value)
+        published_dates.add(day)
+
+        # Реплика может ещё не получить новую версию, поэтому тексты на эту дату пока читаются с основной бд
+        mark_recent_write(day)
+        schedules_cache.invalidate_matching(lambda key: key[0] == day)
+    elif kind == 'deleted':
+        day = date.fromisoformat(value)
+        published_dates.difference_update([published for published in published_dates if published <= day])
+        schedules_cache.invalidate_matching(lambda key: key[0] <= day)
+
+
+async def publish_invalidation(kind: str, value: int | str | date) -> None:
+    """
+    Сообщает остальным процессам бота об изменении данных, закэшированных в памяти.
+    Без Redis ничего не делает.
+
+    Аргументы:
+        kind (str): Тип изменения, см. apply_invalidation.
+        value (int | str | date): Telegram ID пользователя или нескольких пользователей через запятую,
+                                  действие с админом или дата.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    redis = get_redis()
+    if redis is None:
+        return
+    value = value.isoformat() if isinstance(value, date) else str(value)
+    try:
+        await redis.publish(INVALIDATION_CHANNEL, f'{_instance_id}:{kind}:{value}')
+    except Exception as ex:
+        # Кэши остальных процессов устареют не более чем на время жизни записей
+        logging.error(ex)
+
+
+async def acquire_job_lock(name: str) -> bool:
+    """
+    Закрепляет запуск задачи планировщика за текущим процессом, чтобы при нескольких процессах бота
+    задача, запланированная на одно время, выполнялась один раз. Без Redis всегда закрепляет запуск.
+
+    Аргументы:
+        name (str): Название задачи.
+
+    Возвращает:
+        bool: True, если задачу должен выполнить текущий процесс, иначе False.
+    """
+    redis = get_redis()
+    if redis is None:
+        return True
+    try:
+        return bool(await redis.set(f'bot:jobs:{name}', _instance_id, nx=True, ex=JOB_LOCK_TTL))
+    except Exception as ex:
+        # Без Redis нельзя проверить остальные процессы, пропускаем запуск, чтобы не выполнить задачу дважды
+        logging.error(ex)
+        return False
+
+
+async def listen_invalidations(on_reconnect: Callable[[], Awaitable[Any]] | None = None) -> None:
+    """
+    Получает сообщения об инвалидации от остальных процессов бота и применяет их к кэшам
+    текущего процесса, переподключаясь к Redis при разрыве соединения. Без Redis сразу завершается.
+
+    Аргументы:
+        on_reconnect (Callable[[], Awaitable[Any]] | None): Функция повторной загрузки данных в памяти,
+                                                            которые не сбрасываются, а загружаются из бд
+                                                            целиком, вызывается после переподключения.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    redis = get_redis()
+    if redis is None:
+        return
+    reconnecting = False
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+
+                # Сообщения, отправленные во время разрыва соединения, потеряны, поэтому сбрасываем кэши
+                if reconnecting:
+                    users_cache.clear()
+                    schedules_cache.clear()
+                    if on_reconnect is not None:
+                        await on_reconnect()
+                async for message in pubsub.listen():
+                    if message['type'] != 'message':
+                        continue
+                    instance_id, kind, value = message['data'].decode().split(':', 2)
+                    if instance_id != _instance_id:
+                        apply_invalidation(kind, value)
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            logging.error(ex)
+        reconnecting = True
+        await asyncio.sleep(LISTEN_RETRY_DELAY)
@@ -0,0 +1,139 @@
+from cachetools import TTLCache
+
+from typing import Any, Callable, Hashable, Set
+from datetime import date
+
+
+# Признак отсутствия ключа в кэше, отличный от закэшированного None
+MISSING = object()
+
+
+class CountingCache:
+    """
+    Класс ограниченного по размеру кэша с временем жизни записей и счётчиками попаданий и промахов.
+
+    При переполнении вытесняются давно не использованные записи, записи старше ttl секунд
+    считаются отсутствующими. В кэше можно хранить None, например для пользователя,
+    которого нет в базе данных.
+
+    Атрибуты:
+        cache (TTLCache): Хранилище записей.
+        hits (int): Количество попаданий.
+        misses (int): Количество промахов.
+
+    Методы:
+        get(key): Возвращает значение по ключу или MISSING.
+        set(key, value): Сохраняет значение по ключу.
+        invalidate(key): Удаляет значение по ключу.
+        invalidate_matching(predicate): Удаляет значения, ключи которых удовлетворяют условию.
+        clear(): Удаляет все значения.
+        stats(): Возвращает размер кэша, количество попаданий, промахов и долю попаданий.
+    """
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """
+        Конструктор класса.
+
+        Аргументы:
+            maxsize (int): Максимальное количество записей.
+            ttl (float): Время жизни записи в секундах.
+
+        Возвращает:
+            None: Метод ничего не возвращает.
+        """
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Возвращает значение по ключу и учитывает попадание или промах.
+
+        Аргументы:
+            key (Hashable): Ключ записи.
+
+        Возвращает:
+            Any: Закэшированное значение или MISSING, если записи нет.
+        """
+        value = self.cache.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Сохраняет значение по ключу.
+
+        Аргументы:
+            key (Hashable): Ключ записи.
+            value (Any): Сохраняемое значение.
+
+        Возвращает:
+            None: Метод ничего не возвращает.
+        """
+        self.cache[key] = value
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Удаляет значение по ключу, если оно есть.
+
+        Аргументы:
+            key (Hashable): Ключ записи.
+
+        Возвращает:
+            None: Метод ничего не возвращает.
+        """
+        self.cache.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> None:
+        """
+        Удаляет значения, ключи которых удовлетворяют условию.
+
+        Аргументы:
+            predicate (Callable[[Hashable], bool]): Условие на ключ записи.
+
+        Возвращает:
+            None: Метод ничего не возвращает.
+        """
+        for key in [key for key in self.cache.keys() if predicate(key)]:
+            self.cache.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Удаляет все значения.
+
+        Аргументы:
+            None: Метод не принимает аргументов.
+
+        Возвращает:
+            None: Метод ничего не возвращает.
+        """
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику кэша.
+
+        Аргументы:
+            None: Метод не принимает аргументов.
+
+        Возвращает:
+            dict: Размер кэша, количество попаданий, промахов и доля попаданий.
+        """
+        requests = self.hits + self.misses
+        return {'size': len(self.cache), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0}
+
+
+# Профили пользователей по Telegram ID, None - пользователь не зарегистрирован
+users_cache = CountingCache(maxsize=10000, ttl=600)
+
+# Готовые тексты расписаний по ключам (дата, класс, группа класса, группа универ-дня)
+schedules_cache = CountingCache(maxsize=2000, ttl=3600)
+
+# Telegram ID администраторов и разработчиков, загружаются при запуске и периодически обновляются
+admins_ids: Set[int] = set()
+
+# Даты, на которые опубликовано расписание
+published_dates: Set[date] = set()
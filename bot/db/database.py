@@ -1,8 +1,196 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event, text
 
-from bot.config import load_db_URL
+from bot.config import load_async_db_URL, load_sync_db_URL, load_replica_db_URL, load_replica_lag_window
+from bot.config import load_pool_settings, is_sqlite_backend
+
+from .metrics import record_query
+
+from cachetools import TTLCache
+
+import inspect
+import asyncio
+import time
+
+
+# Общие для всего процесса движки и фабрики сессий, создаются при первом обращении
+_async_engine: AsyncEngine | None = None
+_async_session_maker: async_sessionmaker | None = None
+_sync_engine: Engine | None = None
+_sync_session_maker: sessionmaker | None = None
+_replica_engine: AsyncEngine | None = None
+_replica_session_maker: async_sessionmaker | None = None
+
+# Ключи недавно изменённых данных, чтения которых пока выполняются на основной бд
+_recent_writes = TTLCache(maxsize=10000, ttl=load_replica_lag_window())
+
+
+def mark_recent_write(key: object) -> None:
+    """
+    Запоминает изменение данных по ключу sticky_arg, сделанное этим или другим процессом бота, чтобы
+    чтения по этому ключу в течение DB_REPLICA_LAG_WINDOW секунд выполнялись на основной бд.
+
+    Аргументы:
+        key (object): Значение аргумента sticky_arg, например Telegram ID пользователя или дата расписания.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    _recent_writes[key] = True
+
+
+def is_recent_write(key: object) -> bool:
+    """
+    Проверяет, изменялись ли недавно данные по ключу sticky_arg, то есть направляются ли их чтения на основную бд.
+
+    Аргументы:
+        key (object): Значение аргумента sticky_arg.
+
+    Возвращает:
+        bool: True, если данные по ключу изменялись в течение DB_REPLICA_LAG_WINDOW секунд, иначе False.
+    """
+    return key in _recent_writes
+
+
+def engine_options() -> dict:
+    """
+    Возвращает параметры создания движка: настройки пула для PostgreSQL, для SQLite
+    используются настройки пула SQLAlchemy по умолчанию.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        dict: Именованные аргументы для create_engine и create_async_engine.
+    """
+    return {} if is_sqlite_backend() else {'pool_pre_ping': True, **load_pool_settings()}
+
+
+def set_sqlite_pragmas(engine: Engine) -> None:
+    """
+    Настраивает каждое новое соединение SQLite: журнал WAL, ожидание блокировок вместо ошибки,
+    внешние ключи и увеличенный кэш страниц.
+
+    Аргументы:
+        engine (Engine): Синхронный движок SQLite или синхронная часть асинхронного движка.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in ('journal_mode=WAL', 'synchronous=NORMAL', 'foreign_keys=ON', 'busy_timeout=5000',
+                       'cache_size=-64000', 'temp_store=MEMORY', 'mmap_size=268435456'):
+            cursor.execute(f'PRAGMA {pragma}')
+        cursor.close()
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Возвращает общий асинхронный движок, при первом вызове создаёт его вместе с фабрикой сессий.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        AsyncEngine: Асинхронный движок SQLAlchemy.
+    """
+    global _async_engine, _async_session_maker
+    if _async_engine is None:
+        _async_engine = create_async_engine(url=load_async_db_URL(), **engine_options())
+        if is_sqlite_backend():
+            set_sqlite_pragmas(_async_engine.sync_engine)
+        _async_session_maker = async_sessionmaker(bind=_async_engine, expire_on_commit=False)
+    return _async_engine
+
+
+def get_replica_engine() -> AsyncEngine:
+    """
+    Возвращает общий асинхронный движок реплики только для чтения, при первом вызове создаёт его
+    вместе с фабрикой сессий. Если реплика не настроена, возвращает движок основной бд.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        AsyncEngine: Асинхронный движок SQLAlchemy.
+    """
+    global _replica_engine, _replica_session_maker
+    if _replica_engine is None:
+        replica_url = load_replica_db_URL()
+        if replica_url is None:
+            _replica_engine = get_async_engine()
+            _replica_session_maker = _async_session_maker
+        else:
+            _replica_engine = create_async_engine(url=f'postgresql+asyncpg{replica_url}', **engine_options())
+            _replica_session_maker = async_sessionmaker(bind=_replica_engine, expire_on_commit=False)
+    return _replica_engine
+
+
+def get_sync_engine() -> Engine:
+    """
+    Возвращает общий синхронный движок, при первом вызове создаёт его вместе с фабрикой сессий.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        Engine: Синхронный движок SQLAlchemy.
+    """
+    global _sync_engine, _sync_session_maker
+    if _sync_engine is None:
+        _sync_engine = create_engine(url=load_sync_db_URL(), **engine_options())
+        if is_sqlite_backend():
+            set_sqlite_pragmas(_sync_engine)
+        _sync_session_maker = sessionmaker(bind=_sync_engine, expire_on_commit=False)
+    return _sync_engine
+
+
+async def warm_up_engine() -> None:
+    """
+    Прогревает пул асинхронного движка: одновременно открывает pool_size соединений
+    и выполняет в каждом пустой запрос, чтобы первые запросы пользователей не тратили
+    время на установку соединения. Для SQLite ничего не делает, так как пул не настраивается.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    if is_sqlite_backend():
+        return
+    engine = get_async_engine()
+
+    async def ping() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text('SELECT 1'))
+
+    await asyncio.gather(*(ping() for _ in range(load_pool_settings()['pool_size'])))
+
+
+async def dispose_engines() -> None:
+    """
+    Закрывает все соединения общих движков при остановке бота.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    global _async_engine, _async_session_maker, _sync_engine, _sync_session_maker
+    global _replica_engine, _replica_session_maker
+    if _replica_engine is not None and _replica_engine is not _async_engine:
+        await _replica_engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _sync_engine is not None:
+        _sync_engine.dispose()
+    _async_engine, _async_session_maker, _sync_engine, _sync_session_maker = None, None, None, None
+    _replica_engine, _replica_session_maker = None, None
 
 
 class DatabaseConnector:
@@ -10,10 +198,14 @@ class DatabaseConnector:
     Класс-декоратор создания сессий подключения к бд
 
     Этот класс позволяет декорировать функции выполняющие запрос к базе данных
-    и создавать для них синхронные или асинхронные сессии.
+    и создавать для них синхронные или асинхронные сессии. Все декорированные функции
+    используют общие для процесса движки и пулы соединений. Функции только для чтения
+    выполняются на реплике, кроме чтений данных, недавно изменённых по тому же ключу.
+    Для каждой функции собирается статистика вызовов, ошибок, длительности и ожидания
+    соединения из пула (см. bot.db.metrics).
 
     Атрибуты:
-        engine (AsyncEngine | Engine): Асинхронный или синхронный движок SQLAlchemy.
+        engine (AsyncEngine | Engine): Общий асинхронный или синхронный движок SQLAlchemy.
         session_maker (async_sessionmaker | sessionmaker): Асинхронная или синхронная фабрика сессий SQLAlchemy.
 
     Методы:
@@ -26,26 +218,75 @@ class DatabaseConnector:
         __call__(func):
             Декоратор, который выбирает тип соединения для указанной функции.
     """
-    def __init__(self, connection_is_async=True) -> None:
+    def __init__(self, connection_is_async=True, readonly=False, sticky_arg: str | None = None) -> None:
         """
-        Конструктор класса для создания движка и генератора сессий.
+        Конструктор класса.
 
-        Создаёт синхронный или асинхронный движок и генератор сессий
-        в зависимости от переданного аргумента.
+        Запоминает тип подключения, сам движок создаётся лениво при первом запросе.
 
         Аргументы:
             connection_is_async (bool, optional): Тип подключения, асинхронное или нет. По умолчанию равен True.
+            readonly (bool, optional): Выполнять ли функцию на реплике только для чтения. По умолчанию равен False.
+            sticky_arg (str | None, optional): Имя аргумента функции, по значению которого изменения
+                                               запоминаются, а чтения после них направляются на основную бд.
+                                               По умолчанию None.
 
         Возвращает:
             None: Метод ничего не возвращает.
         """
         self.connection_is_async = connection_is_async
-        if connection_is_async:
-            self.engine = create_async_engine(url=f'postgresql+asyncpg{load_db_URL()}')
-            self.session_maker = async_sessionmaker(bind=self.engine, expire_on_commit=False)
-        else:
-            self.engine = create_engine(url=f'postgresql+psycopg2{load_db_URL()}', pool_pre_ping=True)
-            self.session_maker = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self.readonly = readonly
+        self.sticky_arg = sticky_arg
+
+    @property
+    def engine(self) -> AsyncEngine | Engine:
+        """
+        Общий движок, соответствующий типу подключения.
+        """
+        return get_async_engine() if self.connection_is_async else get_sync_engine()
+
+    @property
+    def session_maker(self) -> async_sessionmaker | sessionmaker:
+        """
+        Общая фабрика сессий, соответствующая типу подключения.
+        """
+        if self.connection_is_async:
+            get_async_engine()
+            return _async_session_maker
+        get_sync_engine()
+        return _sync_session_maker
+
+    def sticky_key(self, signature: inspect.Signature, args: tuple, kwargs: dict) -> object:
+        """
+        Возвращает значение аргумента sticky_arg для вызова декорированной функции.
+
+        Аргументы:
+            signature (inspect.Signature): Сигнатура декорированной функции.
+            args (tuple): Позиционные аргументы вызова без сессии.
+            kwargs (dict): Именованные аргументы вызова.
+
+        Возвращает:
+            object: Значение аргумента или None, если sticky_arg не задан.
+        """
+        if self.sticky_arg is None:
+            return None
+        return signature.bind(None, *args, **kwargs).arguments.get(self.sticky_arg)
+
+    def async_session_maker(self, key: object) -> async_sessionmaker:
+        """
+        Выбирает фабрику асинхронных сессий: реплики для функций только для чтения,
+        если данные по ключу не изменялись недавно, иначе основной бд.
+
+        Аргументы:
+            key (object): Значение аргумента sticky_arg.
+
+        Возвращает:
+            async_sessionmaker: Фабрика асинхронных сессий.
+        """
+        if self.readonly and (key is None or not is_recent_write(key)):
+            get_replica_engine()
+            return _replica_session_maker
+        return self.session_maker
 
     def async_connection(self, method):
         """
@@ -66,15 +307,29 @@ class DatabaseConnector:
             Все исключения, возникающие при выполнении метода, будут перехвачены.
             В случае ошибки транзакция будет откатана, а сессия закрыта.
         """
+        signature = inspect.signature(method)
+
         async def wrapper(*args, **kwargs):
-            async with self.session_maker() as session:
+            key = self.sticky_key(signature, args, kwargs)
+            start, checkout_wait, failed = time.perf_counter(), 0.0, True
+            async with self.async_session_maker(key)() as session:
                 try:
-                    return await method(session, *args, **kwargs)
+                    await session.connection()
+                    checkout_wait = time.perf_counter() - start
+                    result = await method(session, *args, **kwargs)
+                    failed = False
                 except Exception as ex:
                     await session.rollback()
                     raise ex
                 finally:
                     await session.close()
+                    record_query(method.__name__, time.perf_counter() - start, checkout_wait, failed, args, kwargs)
+
+            # Запоминаем изменение, чтобы следующие чтения по этому ключу видели его
+            if key is not None and not self.readonly:
+                mark_recent_write(key)
+            return result
+
         return wrapper
 
     def regular_connection(self, method):
@@ -97,14 +352,20 @@ class DatabaseConnector:
             В случае ошибки транзакция будет откатана, а сессия закрыта.
         """
         def wrapper(*args, **kwargs):
+            start, checkout_wait, failed = time.perf_counter(), 0.0, True
             with self.session_maker() as session:
                 try:
-                    return method(session, *args, **kwargs)
+                    session.connection()
+                    checkout_wait = time.perf_counter() - start
+                    result = method(session, *args, **kwargs)
+                    failed = False
+                    return result
                 except Exception as ex:
                     session.rollback()
                     raise ex
                 finally:
                     session.close()
+                    record_query(method.__name__, time.perf_counter() - start, checkout_wait, failed, args, kwargs)
         return wrapper
 
     def __call__(self, func):
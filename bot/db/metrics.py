@@ -0,0 +1,155 @@
+from bot.config import load_slow_query_threshold
+
+from collections import deque
+from typing import Dict
+
+import logging
+import reprlib
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class QueryStats:
+    """
+    Класс статистики выполнения одной функции запроса к базе данных.
+
+    Хранит счётчики вызовов и ошибок, а также последние замеры длительности выполнения
+    и ожидания соединения из пула, по которым считаются перцентили.
+
+    Атрибуты:
+        calls (int): Количество вызовов.
+        errors (int): Количество вызовов, завершившихся исключением.
+        latencies (deque): Последние замеры длительности выполнения в секундах.
+        checkout_waits (deque): Последние замеры ожидания соединения из пула в секундах.
+
+    Методы:
+        record(latency, checkout_wait, failed):
+            Добавляет замер одного вызова.
+
+        snapshot():
+            Возвращает текущую статистику в виде словаря.
+    """
+    def __init__(self, window: int = 1000) -> None:
+        """
+        Конструктор класса.
+
+        Аргументы:
+            window (int, optional): Количество последних замеров, по которым считаются перцентили.
+                                    По умолчанию равно 1000.
+
+        Возвращает:
+            None: Метод ничего не возвращает.
+        """
+        self.calls = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+        self.checkout_waits = deque(maxlen=window)
+
+    def record(self, latency: float, checkout_wait: float, failed: bool) -> None:
+        """
+        Добавляет замер одного вызова.
+
+        Аргументы:
+            latency (float): Длительность выполнения в секундах.
+            checkout_wait (float): Время ожидания соединения из пула в секундах.
+            failed (bool): Завершился ли вызов исключением.
+
+        Возвращает:
+            None: Метод ничего не возвращает.
+        """
+        self.calls += 1
+        self.errors += failed
+        self.latencies.append(latency)
+        self.checkout_waits.append(checkout_wait)
+
+    @staticmethod
+    def percentile(samples: deque, percent: int) -> float:
+        """
+        Считает перцентиль замеров в миллисекундах.
+
+        Аргументы:
+            samples (deque): Замеры в секундах.
+            percent (int): Искомый перцентиль.
+
+        Возвращает:
+            float: Значение перцентиля в миллисекундах или 0, если замеров нет.
+        """
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, len(ordered) * percent // 100)] * 1000
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает текущую статистику в виде словаря.
+
+        Аргументы:
+            None: Метод не принимает аргументов.
+
+        Возвращает:
+            dict: Количество вызовов и ошибок, перцентили длительности и ожидания соединения в миллисекундах.
+        """
+        return {'calls': self.calls, 'errors': self.errors,
+                'p50_ms': self.percentile(self.latencies, 50),
+                'p95_ms': self.percentile(self.latencies, 95),
+                'p99_ms': self.percentile(self.latencies, 99),
+                'checkout_p95_ms': self.percentile(self.checkout_waits, 95)}
+
+
+# Статистика по имени декорированной функции
+_query_stats: Dict[str, QueryStats] = {}
+_slow_query_threshold = load_slow_query_threshold()
+
+# Ограничение длины аргументов в логе медленных запросов, чтобы не выводить большие списки целиком
+_args_repr = reprlib.Repr()
+_args_repr.maxlist = _args_repr.maxtuple = _args_repr.maxdict = _args_repr.maxset = 5
+_args_repr.maxstring = _args_repr.maxother = 100
+
+
+def record_query(name: str, latency: float, checkout_wait: float, failed: bool, args: tuple, kwargs: dict) -> None:
+    """
+    Добавляет замер вызова функции запроса и логирует медленный вызов вместе с его аргументами.
+
+    Аргументы:
+        name (str): Имя функции запроса.
+        latency (float): Длительность выполнения в секундах.
+        checkout_wait (float): Время ожидания соединения из пула в секундах.
+        failed (bool): Завершился ли вызов исключением.
+        args (tuple): Позиционные аргументы вызова без сессии.
+        kwargs (dict): Именованные аргументы вызова.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    _query_stats.setdefault(name, QueryStats()).record(latency, checkout_wait, failed)
+    if latency * 1000 >= _slow_query_threshold:
+        logger.warning(f'медленный запрос {name}: {latency * 1000:.0f} мс, '
+                       f'ожидание соединения {checkout_wait * 1000:.0f} мс, аргументы: {_args_repr.repr(args)} {_args_repr.repr(kwargs)}')
+
+
+def get_query_stats() -> Dict[str, dict]:
+    """
+    Возвращает статистику всех функций запросов к базе данных.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        Dict[str, dict]: Словарь с именами функций и их статистикой из QueryStats.snapshot.
+    """
+    return {name: stats.snapshot() for name, stats in _query_stats.items()}
+
+
+def reset_query_stats() -> None:
+    """
+    Сбрасывает статистику всех функций запросов к базе данных.
+
+    Аргументы:
+        None: функция ничего не принимает.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    _query_stats.clear()
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, Integer, Text, String, Date
+from sqlalchemy import BigInteger, Integer, Text, String, Date, DateTime, Index, ForeignKey, func
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
 from sqlalchemy.ext.asyncio import AsyncAttrs
 
@@ -22,14 +22,18 @@ class Lesson(Base):
 
     Этот класс наследуется от базового класса Base, определяет общие
     атрибуты для всех уроков, такие как идентификатор, номер урока,
-    информация о уроке и дата. Не используется напрямую и служит основой
-    для других моделей.
+    информация о уроке, дата и версия расписания. Не используется напрямую
+    и служит основой для других моделей. В PostgreSQL таблицы уроков разбиты
+    на помесячные партиции по дате и имеют первичный ключ (id, date), созданный
+    миграцией; ORM сопоставляет уроки только по id, чтобы в SQLite id
+    генерировался автоматически.
     """
     __abstract__ = True
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     lesson_number: Mapped[int] = mapped_column(Integer, nullable=False)
     lesson_info: Mapped[str] = mapped_column(Text, nullable=False)
     date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False)
 
 
 class Regular_schedule(Lesson):
@@ -40,6 +44,11 @@ class Regular_schedule(Lesson):
     для обычного расписания: буква класса и группа класса.
     """
     __tablename__ = 'regular_schedule'
+    __table_args__ = (
+        Index('ix_regular_schedule_version_class', 'version_id', 'class_letter', 'class_group', 'lesson_number',
+              postgresql_include=['lesson_info']),
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
     class_letter: Mapped[str] = mapped_column(String(5), nullable=False)
     class_group: Mapped[int] = mapped_column(Integer, nullable=False)
 
@@ -52,9 +61,60 @@ class Uday_schedule(Lesson):
     для расписания универ-дня - группу универ-дня.
     """
     __tablename__ = 'uday_schedule'
+    __table_args__ = (
+        Index('ix_uday_schedule_version_group', 'version_id', 'uday_group', 'lesson_number',
+              postgresql_include=['lesson_info']),
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
     uday_group: Mapped[int] = mapped_column(Integer, nullable=False)
 
 
+class Schedule_version(Base):
+    """
+    Модель версии расписания.
+
+    Каждая загрузка расписания на дату создаёт новую версию, уроки которой
+    записываются в таблицы расписаний с её идентификатором. Пользователям
+    версия становится видна только после публикации. Хэши файла и набора уроков
+    позволяют не загружать повторно то же самое расписание.
+    """
+    __tablename__ = 'schedule_versions'
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    date: Mapped[datetime.date] = mapped_column(Date, nullable=False, index=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    file_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    lessons_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+
+class Published_schedule(Base):
+    """
+    Модель опубликованного расписания.
+
+    Хранит для каждой даты указатель на актуальную версию расписания,
+    все запросы пользователей читают уроки только этой версии.
+    """
+    __tablename__ = 'published_schedules'
+    date: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    version_id: Mapped[int] = mapped_column(ForeignKey('schedule_versions.id'), nullable=False)
+
+
+class Rendered_schedule(Base):
+    """
+    Модель готового текста расписания.
+
+    Хранит для каждой версии расписания итоговый текст сообщения для каждого
+    сочетания класса, группы класса и группы универ-дня, составленный при
+    загрузке расписания. Незначимая в этот день группа равна нулю.
+    """
+    __tablename__ = 'rendered_schedules'
+    version_id: Mapped[int] = mapped_column(ForeignKey('schedule_versions.id', ondelete='CASCADE'),
+                                            primary_key=True)
+    class_letter: Mapped[str] = mapped_column(String(5), primary_key=True)
+    class_group: Mapped[int] = mapped_column(Integer, primary_key=True)
+    uday_group: Mapped[int] = mapped_column(Integer, primary_key=True)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+
+
 class User(Base):
     """
     Модель пользователя.
@@ -64,6 +124,9 @@ class User(Base):
     имеет уникальный идентификатор.
     """
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_class_letter', 'class_letter', postgresql_ops={'class_letter': 'varchar_pattern_ops'}),
+    )
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, unique=True)
     class_letter: Mapped[str] = mapped_column(String(5), nullable=False)
     class_group: Mapped[int] = mapped_column(Integer, nullable=False)
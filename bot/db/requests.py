@@ -1,34 +1,56 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
-from sqlalchemy import select, exists
+from sqlalchemy import select, exists, delete, insert, update, func, text, tuple_, union_all, literal, bindparam
 
-from .database import DatabaseConnector
-from .models import User, Admin, Regular_schedule, Uday_schedule
+from .database import DatabaseConnector, mark_recent_write, is_recent_write
+from .cache import MISSING, users_cache, schedules_cache, admins_ids, published_dates
+from .broker import publish_invalidation
+from .models import Base, User, Admin, Regular_schedule, Uday_schedule, Schedule_version, Published_schedule
+from .models import Rendered_schedule
 from bot.misc.lesson import Lesson
+from bot.misc.rendering import schedule_key
+from bot.misc.diff import ScheduleDiff
+from bot.config import load_developers_ids
 
-from typing import List, Tuple
-from datetime import date
+from typing import AsyncIterator, Dict, Iterable, List, Tuple
+from datetime import date, timedelta
 
+import re
 
-@DatabaseConnector()
-async def is_admin(session: AsyncSession, tg_id: int) -> bool:
+
+def is_admin(tg_id: int) -> bool:
     """
-    Проверяет, является ли пользователь администратором.
+    Проверяет, является ли пользователь администратором или разработчиком, по множеству
+    идентификаторов в памяти без обращения к базе данных.
 
     Параметры:
-        session (AsyncSession): Сессия для работы с базой данных.
         tg_id (int): Уникальный идентификатор пользователя в Telegram.
 
     Возвращает:
         bool: True, если пользователь является администратором, иначе False.
     """
-    return await session.scalar(exists().where(Admin.id == tg_id).select())
+    return tg_id in admins_ids
 
 
-@DatabaseConnector()
+async def refresh_admins() -> None:
+    """
+    Загружает идентификаторы администраторов из базы данных и разработчиков из переменных окружения
+    и заменяет ими множество идентификаторов в памяти.
+
+    Параметры:
+        None: Функция не принимает аргументов.
+
+    Возвращает:
+        None: Функция ничего не возвращает.
+    """
+    ids = set(await get_admins()) | set(load_developers_ids())
+    admins_ids.clear()
+    admins_ids.update(ids)
+
+
+@DatabaseConnector(sticky_arg='tg_id')
 async def set_admin(session: AsyncSession, tg_id: int) -> None:
     """
-    Добавляет нового администратора в базу данных.
+    Добавляет нового администратора в базу данных и в множество идентификаторов в памяти.
 
     Параметры:
         session (AsyncSession): Сессия для работы с базой данных.
@@ -40,6 +62,27 @@ async def set_admin(session: AsyncSession, tg_id: int) -> None:
     new_admin = Admin(id=tg_id)
     await session.merge(new_admin)
     await session.commit()
+    admins_ids.add(tg_id)
+    await publish_invalidation('admin', f'add:{tg_id}')
+
+
+@DatabaseConnector(sticky_arg='tg_id')
+async def delete_admin(session: AsyncSession, tg_id: int) -> None:
+    """
+    Удаляет администратора из базы данных и из множества идентификаторов в памяти всех процессов бота.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        tg_id (int): Уникальный идентификатор пользователя в Telegram.
+
+    Возвращает:
+        None: Функция ничего не возвращает.
+    """
+    await session.execute(delete(Admin).where(Admin.id == tg_id))
+    await session.commit()
+    if tg_id not in load_developers_ids():
+        admins_ids.discard(tg_id)
+        await publish_invalidation('admin', f'remove:{tg_id}')
 
 
 @DatabaseConnector()
@@ -57,10 +100,10 @@ async def get_admins(session: AsyncSession) -> List[int]:
     return list(result.scalars())
 
 
-@DatabaseConnector()
+@DatabaseConnector(sticky_arg='tg_id')
 async def set_user(session: AsyncSession, tg_id: int, class_letter: str, class_group: int, uday_group: int) -> None:
     """
-    Добавляет нового пользователя в базу данных.
+    Добавляет нового пользователя в базу данных и обновляет его профиль в кэше.
 
     Параметры:
         session (AsyncSession): Сессия для работы с базой данных.
@@ -75,12 +118,14 @@ async def set_user(session: AsyncSession, tg_id: int, class_letter: str, class_g
     new_user = User(id=tg_id, class_letter=class_letter, class_group=class_group, uday_group=uday_group)
     await session.merge(new_user)
     await session.commit()
+    users_cache.set(tg_id, new_user)
+    await publish_invalidation('user', tg_id)
 
 
-@DatabaseConnector()
-async def get_user(session: AsyncSession, tg_id: int) -> User | None:
+@DatabaseConnector(readonly=True, sticky_arg='tg_id')
+async def fetch_user(session: AsyncSession, tg_id: int) -> User | None:
     """
-    Извлекает пользователя из базы данных по его Telegram ID.
+    Извлекает пользователя из базы данных по его Telegram ID в обход кэша.
 
     Параметры:
         session (AsyncSession): Сессия для работы с базой данных.
@@ -92,10 +137,34 @@ async def get_user(session: AsyncSession, tg_id: int) -> User | None:
     return await session.scalar(select(User).filter_by(id=tg_id))
 
 
-@DatabaseConnector()
+async def get_user(tg_id: int) -> User | None:
+    """
+    Возвращает пользователя по его Telegram ID из кэша, при промахе извлекает его из базы данных
+    и кэширует, в том числе отсутствие незарегистрированного пользователя. После изменения пользователя
+    этим или другим процессом бота он читается с основной бд.
+
+    Параметры:
+        tg_id (int): Уникальный идентификатор пользователя в Telegram.
+
+    Возвращает:
+        User | None: Объект пользователя или None, если пользователь не найден.
+    """
+    user = users_cache.get(tg_id)
+    if user is MISSING:
+        read_from_primary = is_recent_write(tg_id)
+        user = await fetch_user(tg_id)
+
+        # Если пользователь изменился во время чтения с реплики, она могла вернуть устаревшие данные
+        # или ещё не зарегистрированного пользователя, такой результат не кэшируем
+        if read_from_primary or not is_recent_write(tg_id):
+            users_cache.set(tg_id, user)
+    return user
+
+
+@DatabaseConnector(sticky_arg='tg_id')
 async def delete_user(session: AsyncSession, tg_id: int) -> None:
     """
-    Удаляет пользователя из базы данных по его Telegram ID.
+    Удаляет пользователя из базы данных по его Telegram ID и из кэша.
 
     Параметры:
         session (AsyncSession): Сессия для работы с базой данных.
@@ -107,61 +176,232 @@ async def delete_user(session: AsyncSession, tg_id: int) -> None:
     user = await session.scalar(select(User).filter_by(id=tg_id))
     await session.delete(user)
     await session.commit()
+    users_cache.invalidate(tg_id)
+    await publish_invalidation('user', tg_id)
 
 
 @DatabaseConnector()
-async def get_users(session: AsyncSession, class_num: str) -> List[int]:
+async def delete_users_bulk(session: AsyncSession, tg_ids: List[int]) -> None:
     """
-    Получает список уникальных идентификаторов пользователей по номеру класса.
+    Удаляет пользователей из базы данных по списку их Telegram ID одним запросом и из кэша.
 
     Параметры:
         session (AsyncSession): Сессия для работы с базой данных.
-        class_num (str): Номер класса для фильтрации пользователей.
+        tg_ids (List[int]): Список уникальных идентификаторов пользователей в Telegram.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    if tg_ids:
+        await session.execute(delete(User).where(User.id.in_(tg_ids)))
+        await session.commit()
+        for tg_id in tg_ids:
+            users_cache.invalidate(tg_id)
+
+        # Остальным процессам отправляется одно сообщение со всеми удалёнными пользователями
+        await publish_invalidation('user', ','.join(map(str, tg_ids)))
+
+
+@DatabaseConnector()
+async def get_users_page(session: AsyncSession, class_num: str | None, last_id: int | None,
+                         chunk_size: int) -> List[int]:
+    """
+    Получает порцию идентификаторов пользователей, следующих по возрастанию за last_id.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        class_num (str | None): Номер класса для фильтрации пользователей или None - все пользователи.
+        last_id (int | None): Последний идентификатор предыдущей порции или None для первой порции.
+        chunk_size (int): Количество идентификаторов в порции.
 
     Возвращает:
         List[int]: Список идентификаторов пользователей.
     """
-    result = await session.execute(select(User.id).filter(User.class_letter.startswith(class_num)))
+    query = select(User.id).order_by(User.id).limit(chunk_size)
+    if class_num:
+        query = query.filter(User.class_letter.startswith(class_num))
+    if last_id is not None:
+        query = query.filter(User.id > last_id)
+    result = await session.execute(query)
     return list(result.scalars())
 
 
+async def iter_users(class_num: str | None = None, chunk_size: int = 500) -> AsyncIterator[int]:
+    """
+    Отдаёт идентификаторы пользователей, получая их из базы данных порциями по возрастанию идентификатора,
+    не загружая весь список в память. Каждая порция читается отдельной короткой сессией, поэтому
+    соединение с бд не удерживается, пока вызывающий код обрабатывает пользователей.
+
+    Параметры:
+        class_num (str | None, optional): Номер класса для фильтрации пользователей. По умолчанию None - все
+                                          пользователи.
+        chunk_size (int, optional): Количество идентификаторов в одной порции. По умолчанию равно 500.
+
+    Возвращает:
+        AsyncIterator[int]: Асинхронный итератор идентификаторов пользователей.
+    """
+    last_id = None
+    while True:
+        users = await get_users_page(class_num, last_id, chunk_size)
+        for user_id in users:
+            yield user_id
+        if len(users) < chunk_size:
+            return
+        last_id = users[-1]
+
+
 @DatabaseConnector()
-async def get_all_users(session: AsyncSession) -> List[int]:
+async def get_user_profiles_page(session: AsyncSession, class_letters: List[str], last_id: int | None,
+                                 chunk_size: int) -> List[Tuple[int, str, int, int]]:
     """
-    Получает список всех уникальных идентификаторов пользователей.
+    Получает порцию идентификаторов и групп пользователей заданных классов, следующих по возрастанию
+    идентификатора за last_id.
 
     Параметры:
         session (AsyncSession): Сессия для работы с базой данных.
+        class_letters (List[str]): Классы пользователей.
+        last_id (int | None): Последний идентификатор предыдущей порции или None для первой порции.
+        chunk_size (int): Количество пользователей в порции.
 
     Возвращает:
-        List[int]: Список всех идентификаторов пользователей.
+        List[Tuple[int, str, int, int]]: Список кортежей (идентификатор, класс, группа класса, группа универ-дня).
     """
-    result = await session.execute(select(User.id))
-    return list(result.scalars())
+    query = (select(User.id, User.class_letter, User.class_group, User.uday_group)
+             .where(User.class_letter.in_(class_letters)).order_by(User.id).limit(chunk_size))
+    if last_id is not None:
+        query = query.filter(User.id > last_id)
+    result = await session.execute(query)
+    return [tuple(row) for row in result]
+
+
+async def iter_user_profiles(class_letters: Iterable[str],
+                             chunk_size: int = 500) -> AsyncIterator[Tuple[int, str, int, int]]:
+    """
+    Отдаёт идентификаторы и группы пользователей заданных классов, получая их из базы данных порциями
+    по возрастанию идентификатора отдельными короткими сессиями.
+
+    Параметры:
+        class_letters (Iterable[str]): Классы пользователей.
+        chunk_size (int, optional): Количество пользователей в одной порции. По умолчанию равно 500.
+
+    Возвращает:
+        AsyncIterator[Tuple[int, str, int, int]]: Асинхронный итератор кортежей (идентификатор, класс,
+                                                  группа класса, группа универ-дня).
+    """
+    class_letters, last_id = list(class_letters), None
+    while True:
+        profiles = await get_user_profiles_page(class_letters, last_id, chunk_size)
+        for profile in profiles:
+            yield profile
+        if len(profiles) < chunk_size:
+            return
+        last_id = profiles[-1][0]
 
 
 @DatabaseConnector()
-async def check_schedule_existence(session: AsyncSession, today: date, tomorrow: date) -> Tuple[bool]:
+async def count_users(session: AsyncSession, class_num: str | None = None) -> int:
     """
-    Проверяет наличие расписания на текущий и следующий день.
+    Подсчитывает количество пользователей.
 
     Параметры:
         session (AsyncSession): Сессия для работы с базой данных.
+        class_num (str | None, optional): Номер класса для фильтрации пользователей. По умолчанию None - все
+                                          пользователи.
+
+    Возвращает:
+        int: Количество пользователей.
+    """
+    query = select(func.count()).select_from(User)
+    if class_num:
+        query = query.filter(User.class_letter.startswith(class_num))
+    return await session.scalar(query)
+
+
+@DatabaseConnector()
+async def get_users_stats(session: AsyncSession) -> List[Tuple[str, int, int, int]]:
+    """
+    Получает количество пользователей в разрезе класса, группы класса и группы универ-дня.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+
+    Возвращает:
+        List[Tuple[str, int, int, int]]: Список кортежей (класс, группа класса, группа универ-дня, количество).
+    """
+    result = await session.execute(
+        select(User.class_letter, User.class_group, User.uday_group, func.count())
+        .group_by(User.class_letter, User.class_group, User.uday_group)
+        .order_by(User.class_letter, User.class_group, User.uday_group))
+    return [tuple(row) for row in result]
+
+
+def check_schedule_existence(today: date, tomorrow: date) -> Tuple[bool]:
+    """
+    Проверяет наличие расписания на текущий и следующий день по множеству опубликованных дат
+    в памяти без обращения к базе данных.
+
+    Параметры:
         today (date): Дата для проверки наличия расписания на сегодня.
         tomorrow (date): Дата для проверки наличия расписания на завтра.
 
     Возвращает:
-        Tuple[bool, bool]: Кортеж, содержащий два булевых значения — наличие расписания на сегодня и завтра.
+        Tuple[bool, bool]: Кортеж, содержащий два булевых значения — наличие опубликованного расписания
+                           на сегодня и завтра.
     """
-    today_flag = await session.scalar(exists().where(Regular_schedule.date == today).select())
-    tomorrow_flag = await session.scalar(exists().where(Regular_schedule.date == tomorrow).select())
-    return (today_flag, tomorrow_flag)
+    return (today in published_dates, tomorrow in published_dates)
 
 
 @DatabaseConnector()
+async def get_published_dates(session: AsyncSession) -> List[date]:
+    """
+    Получает список дат, на которые опубликовано расписание.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+
+    Возвращает:
+        List[date]: Список дат опубликованных расписаний.
+    """
+    result = await session.execute(select(Published_schedule.date))
+    return list(result.scalars())
+
+
+async def refresh_published_dates() -> None:
+    """
+    Загружает даты опубликованных расписаний из базы данных и заменяет ими множество дат в памяти.
+
+    Параметры:
+        None: Функция не принимает аргументов.
+
+    Возвращает:
+        None: Функция ничего не возвращает.
+    """
+    dates = set(await get_published_dates())
+    published_dates.clear()
+    published_dates.update(dates)
+
+
+# Опубликованная версия расписания на дату
+_published_version = select(Published_schedule.version_id).where(
+    Published_schedule.date == bindparam('date')).scalar_subquery()
+
+# Уроки универ-дня и обычные уроки одним запросом, запрос собирается один раз, поэтому SQLAlchemy и asyncpg
+# переиспользуют скомпилированный и подготовленный запрос. В обычный день uday_group равен NULL
+_schedule_lessons = union_all(
+    select(literal(0).label('part'), Uday_schedule.lesson_number, Uday_schedule.lesson_info)
+    .where(Uday_schedule.version_id == _published_version, Uday_schedule.uday_group == bindparam('uday_group')),
+    select(literal(1).label('part'), Regular_schedule.lesson_number, Regular_schedule.lesson_info)
+    .where(Regular_schedule.version_id == _published_version, Regular_schedule.class_letter == bindparam('letter'),
+           Regular_schedule.class_group == bindparam('group'))
+).subquery()
+_user_schedule_query = select(_schedule_lessons.c.lesson_info).order_by(_schedule_lessons.c.part,
+                                                                        _schedule_lessons.c.lesson_number)
+
+
+@DatabaseConnector(readonly=True, sticky_arg='date')
 async def get_user_schedule(session: AsyncSession, letter: str, group: int, uday_group: int, date: date) -> List[str]:
     """
-    Получает расписание пользователя на заданную дату.
+    Получает расписание пользователя на заданную дату за один запрос к базе данных.
 
     Параметры:
         session (AsyncSession): Сессия для работы с базой данных.
@@ -171,93 +411,454 @@ async def get_user_schedule(session: AsyncSession, letter: str, group: int, uday
         date (date): Дата для получения расписания.
 
     Возвращает:
-        List[str]: Список информации об уроках на указанную дату.
+        List[str]: Список информации об уроках на указанную дату, сначала уроки универ-дня, затем обычные.
     """
-    uday_lessons = []
+    # В универ-день обычные уроки берутся у всего класса, а не у группы
     if letter.startswith('10') and date.weekday() == 0 or letter.startswith('11') and date.weekday() == 2:
-        uday_lessons = await session.execute(select(Uday_schedule.lesson_info).where(
-            Uday_schedule.uday_group == uday_group,
-            Uday_schedule.date == date).order_by(Uday_schedule.lesson_number))
-        uday_lessons = list(uday_lessons.scalars())
         group = 0
+    else:
+        uday_group = None
+    result = await session.execute(_user_schedule_query, {'date': date, 'letter': letter, 'group': group,
+                                                          'uday_group': uday_group})
+    return list(result.scalars())
+
+
+@DatabaseConnector(readonly=True, sticky_arg='date')
+async def get_rendered_schedule(session: AsyncSession, date: date, class_letter: str, class_group: int,
+                                uday_group: int) -> str | None:
+    """
+    Получает готовый текст опубликованного расписания на заданную дату по ключу из schedule_key.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        date (date): Дата расписания.
+        class_letter (str): Класс пользователя.
+        class_group (int): Группа класса, ноль в универ-день.
+        uday_group (int): Группа универ-дня, ноль в обычный день.
+
+    Возвращает:
+        str | None: Текст расписания или None, если для версии нет готового текста.
+    """
+    return await session.scalar(select(Rendered_schedule.text).where(
+        Rendered_schedule.version_id == select(Published_schedule.version_id).filter_by(date=date).scalar_subquery(),
+        Rendered_schedule.class_letter == class_letter,
+        Rendered_schedule.class_group == class_group,
+        Rendered_schedule.uday_group == uday_group))
+
+
+async def get_schedule_text(date: date, class_letter: str, class_group: int, uday_group: int) -> str:
+    """
+    Возвращает текст опубликованного расписания пользователя на заданную дату из кэша, при промахе
+    извлекает готовый текст из базы данных, а для версий без готового текста составляет его из уроков,
+    и кэширует непустой результат. Пользователи одного класса, группы и группы универ-дня получают один
+    и тот же текст. Сразу после публикации расписания на дату тексты на неё читаются с основной бд.
+
+    Параметры:
+        date (date): Дата расписания.
+        class_letter (str): Класс пользователя.
+        class_group (int): Группа класса пользователя.
+        uday_group (int): Группа универ-дня пользователя.
+
+    Возвращает:
+        str: Текст расписания, пустая строка, если расписание не найдено.
+    """
+    key = (date, *schedule_key(class_letter, class_group, uday_group, date))
+    text = schedules_cache.get(key)
+    if text is MISSING:
+        text = await get_rendered_schedule(*key)
+        if text is None:
+            text = '\n\n'.join(await get_user_schedule(class_letter, class_group, uday_group, date))
+
+        # Пустой текст не кэшируем: расписание могло быть опубликовано, но ещё не дойти до реплики
+        if text:
+            schedules_cache.set(key, text)
+    return text
+
+
+@DatabaseConnector()
+async def get_published_hashes(session: AsyncSession, date: date) -> Tuple[str | None, str | None]:
+    """
+    Получает хэши файла и набора уроков опубликованной версии расписания на заданную дату.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        date (date): Дата расписания.
+
+    Возвращает:
+        Tuple[str | None, str | None]: Хэш файла и хэш набора уроков или None, если расписание
+                                       не опубликовано или загружено без хэшей.
+    """
+    row = (await session.execute(
+        select(Schedule_version.file_hash, Schedule_version.lessons_hash)
+        .join(Published_schedule, Published_schedule.version_id == Schedule_version.id)
+        .where(Published_schedule.date == date))).first()
+    return tuple(row) if row else (None, None)
+
+
+@DatabaseConnector()
+async def set_published_file_hash(session: AsyncSession, date: date, file_hash: str) -> None:
+    """
+    Записывает хэш файла в опубликованную версию расписания на заданную дату, чтобы повторная
+    загрузка этого файла распознавалась без парсинга.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        date (date): Дата расписания.
+        file_hash (str): Хэш загруженного файла расписания.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    published_version = select(Published_schedule.version_id).where(Published_schedule.date == date).scalar_subquery()
+    await session.execute(update(Schedule_version).where(Schedule_version.id == published_version)
+                          .values(file_hash=file_hash))
+    await session.commit()
+
+
+@DatabaseConnector()
+async def get_published_lessons(session: AsyncSession, date: date) -> Tuple[int | None, List[Lesson], List[Lesson]]:
+    """
+    Получает уроки опубликованной версии расписания на заданную дату. Читает с основной бд,
+    так как результат используется для изменения этой версии.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        date (date): Дата расписания.
+
+    Возвращает:
+        Tuple[int | None, List[Lesson], List[Lesson]]: Идентификатор опубликованной версии или None, если
+                                                       расписание не опубликовано, обычные уроки и уроки универ-дня.
+    """
+    version_id = await session.scalar(select(Published_schedule.version_id).filter_by(date=date))
+    if version_id is None:
+        return None, [], []
+    regular = await session.execute(
+        select(Regular_schedule.lesson_number, Regular_schedule.lesson_info, Regular_schedule.class_letter,
+               Regular_schedule.class_group)
+        .where(Regular_schedule.version_id == version_id, Regular_schedule.date == date))
+    uday = await session.execute(
+        select(Uday_schedule.lesson_number, Uday_schedule.lesson_info, Uday_schedule.uday_group)
+        .where(Uday_schedule.version_id == version_id, Uday_schedule.date == date))
+    return (version_id,
+            [Lesson(num=num, info=info, date=date, group_num=group, class_letter=letter)
+             for num, info, letter, group in regular],
+            [Lesson(num=num, info=info, date=date, group_num=group) for num, info, group in uday])
+
+
+@DatabaseConnector()
+async def get_rendered_schedules(session: AsyncSession, date: date) -> Dict[Tuple[str, int, int], str]:
+    """
+    Получает все готовые тексты опубликованного расписания на заданную дату. Читает с основной бд,
+    так как вызывается сразу после публикации.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        date (date): Дата расписания.
+
+    Возвращает:
+        Dict[Tuple[str, int, int], str]: Тексты расписания по ключам из schedule_key.
+    """
+    result = await session.execute(
+        select(Rendered_schedule.class_letter, Rendered_schedule.class_group, Rendered_schedule.uday_group,
+               Rendered_schedule.text)
+        .where(Rendered_schedule.version_id == select(Published_schedule.version_id)
+               .filter_by(date=date).scalar_subquery()))
+    return {(letter, group, uday_group): text for letter, group, uday_group, text in result}
+
+
+async def warm_up_schedule_cache(date: date) -> int:
+    """
+    Заполняет кэш текстов расписания на заданную дату для всех сочетаний класса, группы и группы
+    универ-дня, которые есть у пользователей. Вызывается после загрузки расписания перед рассылкой
+    уведомлений, чтобы запросы расписания сразу после неё не обращались к базе данных. Сочетания,
+    для которых нет готового текста, пропускаются.
+
+    Параметры:
+        date (date): Дата расписания.
 
-    regular_lessons = await session.execute(select(Regular_schedule.lesson_info).where(
-        Regular_schedule.class_letter == letter,
-        Regular_schedule.class_group == group,
-        Regular_schedule.date == date).order_by(Regular_schedule.lesson_number))
-    regular_lessons = list(regular_lessons.scalars())
+    Возвращает:
+        int: Количество записей, добавленных в кэш.
+    """
+    rendered = await get_rendered_schedules(date)
+    keys = {(date, *schedule_key(letter, group, uday_group, date))
+            for letter, group, uday_group, _ in await get_users_stats()}
 
-    return uday_lessons + regular_lessons
+    # Сочетания без готового текста не кэшируем: get_schedule_text составит их текст из уроков при запросе
+    keys = [key for key in keys if key[1:] in rendered]
+    for key in keys:
+        schedules_cache.set(key, rendered[key[1:]])
+    return len(keys)
 
 
-@DatabaseConnector(connection_is_async=False)
-def delete_old_schedules(session: Session, date: date) -> None:
+@DatabaseConnector()
+async def delete_old_schedules(session: AsyncSession, date: date) -> None:
     """
-    Удаляет расписания, которые старше или равны заданной дате.
+    Снимает с публикации и удаляет версии расписаний, которые старше или равны заданной дате.
+    Сами уроки удаляются вместе с устаревшими партициями таблиц расписаний.
 
     Параметры:
-        session (Session): Сессия для работы с базой данных.
+        session (AsyncSession): Сессия для работы с базой данных.
         date (date): Дата, до которой необходимо удалить расписания.
 
     Возвращает:
         None: функция ничего не возвращает.
     """
-    session.query(Regular_schedule).filter(Regular_schedule.date <= date).delete(synchronize_session=False)
-    session.query(Uday_schedule).filter(Uday_schedule.date <= date).delete(synchronize_session=False)
-    session.commit()
+    await session.execute(delete(Published_schedule).where(Published_schedule.date <= date))
+    await session.execute(delete(Schedule_version).where(Schedule_version.date <= date))
+    await session.commit()
+    published_dates.difference_update([day for day in published_dates if day <= date])
+    schedules_cache.invalidate_matching(lambda key: key[0] <= date)
+    await publish_invalidation('deleted', date)
 
 
-@DatabaseConnector(connection_is_async=False)
-def delete_repeated_schedule(session: Session, date: date) -> None:
+@DatabaseConnector()
+async def collect_stale_versions(session: AsyncSession) -> None:
     """
-    Удаляет повторяющееся расписание на заданную дату.
+    Удаляет версии расписаний, вытесненные более новой опубликованной версией той же даты,
+    вместе с их уроками. Версии, которые ещё загружаются, не затрагиваются.
 
     Параметры:
-        session (Session): Сессия для работы с базой данных.
-        date (date): Дата для удаления повторяющегося расписания.
+        session (AsyncSession): Сессия для работы с базой данных.
 
     Возвращает:
         None: функция ничего не возвращает.
     """
-    if session.scalar(exists().where(Regular_schedule.date == date).select()):
-        session.query(Regular_schedule).filter(Regular_schedule.date == date).delete(synchronize_session=False)
-        session.query(Uday_schedule).filter(Uday_schedule.date == date).delete(synchronize_session=False)
-        session.commit()
+    superseded = exists().where(Published_schedule.date == Schedule_version.date,
+                                Published_schedule.version_id > Schedule_version.id)
+    stale_versions = (await session.execute(select(Schedule_version.id, Schedule_version.date).where(
+        Schedule_version.id.not_in(select(Published_schedule.version_id)), superseded))).all()
+    if stale_versions:
+        stale_ids = [version_id for version_id, _ in stale_versions]
+        # Условие по дате позволяет postgres не просматривать лишние партиции
+        stale_dates = {version_date for _, version_date in stale_versions}
+        await session.execute(delete(Regular_schedule).where(Regular_schedule.date.in_(stale_dates),
+                                                             Regular_schedule.version_id.in_(stale_ids)))
+        await session.execute(delete(Uday_schedule).where(Uday_schedule.date.in_(stale_dates),
+                                                          Uday_schedule.version_id.in_(stale_ids)))
+        await session.execute(delete(Schedule_version).where(Schedule_version.id.in_(stale_ids)))
+        await session.commit()
+
+
+def _month_start(day: date, months_offset: int = 0) -> date:
+    """
+    Возвращает первое число месяца, отстоящего от месяца заданной даты на указанное количество месяцев.
 
+    Параметры:
+        day (date): Исходная дата.
+        months_offset (int, optional): Смещение в месяцах. По умолчанию равно 0.
 
-@DatabaseConnector(connection_is_async=False)
-def add_regular_lessons(session: Session, lessons_list: List[Lesson]) -> None:
+    Возвращает:
+        date: Первое число искомого месяца.
     """
-    Добавляет список обычных уроков в базу данных.
+    months = day.year * 12 + day.month - 1 + months_offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+@DatabaseConnector()
+async def create_schedule_partitions(session: AsyncSession, date: date, months_ahead: int = 2) -> None:
+    """
+    Создаёт отсутствующие помесячные партиции таблиц расписаний, начиная с месяца заданной даты.
+    Для SQLite ничего не делает.
 
     Параметры:
-        session (Session): Сессия для работы с базой данных.
-        lessons_list (List[Lesson]): Список объектов уроков для добавления.
+        session (AsyncSession): Сессия для работы с базой данных.
+        date (date): Дата, с месяца которой создаются партиции.
+        months_ahead (int, optional): Количество следующих месяцев, для которых также создаются партиции.
+                                      По умолчанию равно 2.
 
     Возвращает:
         None: функция ничего не возвращает.
     """
-    lessons_to_save = [Regular_schedule(lesson_number=lesson.num, lesson_info=lesson.info, date=lesson.date,
-                       class_letter=lesson.class_letter, class_group=lesson.group_num) for lesson in lessons_list]
+    # Встроенная бд SQLite не поддерживает партиционирование
+    if session.bind.dialect.name != 'postgresql':
+        return
+
+    for offset in range(months_ahead + 1):
+        start, end = _month_start(date, offset), _month_start(date, offset + 1)
+        for table in (Regular_schedule.__tablename__, Uday_schedule.__tablename__):
+            await session.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_y{start.year}m{start.month:02} "
+                                       f"PARTITION OF {table} FOR VALUES FROM ('{start}') TO ('{end}')"))
+    await session.commit()
+
+
+@DatabaseConnector()
+async def drop_schedule_partitions(session: AsyncSession, date: date) -> None:
+    """
+    Отсоединяет и удаляет партиции таблиц расписаний, все даты которых старше или равны заданной.
+    Для SQLite удаляет устаревшие уроки построчно.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        date (date): Дата, до которой необходимо удалить расписания.
+
+    Возвращает:
+        None: функция ничего не возвращает.
+    """
+    # В SQLite таблицы не партиционированы, поэтому устаревшие уроки удаляются построчно
+    if session.bind.dialect.name != 'postgresql':
+        await session.execute(delete(Regular_schedule).where(Regular_schedule.date <= date))
+        await session.execute(delete(Uday_schedule).where(Uday_schedule.date <= date))
+        await session.commit()
+        return
+
+    # Партиция месяца целиком устарела, если её месяц раньше месяца следующего за date дня
+    next_day = date + timedelta(days=1)
+    stale_partitions = []
+    for table in (Regular_schedule.__tablename__, Uday_schedule.__tablename__):
+        partitions = await session.execute(text(
+            'SELECT child.relname, pg_inherits.inhdetachpending FROM pg_inherits '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE parent.relname = :table'), {'table': table})
+        for partition, detach_pending in partitions:
+            # Партиции с названием не по шаблону месячных партиций не трогаем
+            match = re.fullmatch(rf'{table}_y(\d{{4}})m(\d{{2}})', partition)
+            if match is not None and (int(match[1]), int(match[2])) < (next_day.year, next_day.month):
+                stale_partitions.append((table, partition, detach_pending))
+    await session.commit()
 
-    session.add_all(lessons_to_save)
-    session.commit()
+    # DETACH PARTITION CONCURRENTLY не блокирует чтение и запись в таблицу, но не может выполняться
+    # внутри транзакции, поэтому партиции отсоединяются через отдельное соединение в режиме autocommit.
+    # Прерванное ранее отсоединение завершается через FINALIZE
+    async with session.bind.connect() as connection:
+        connection = await connection.execution_options(isolation_level='AUTOCOMMIT')
+        for table, partition, detach_pending in stale_partitions:
+            mode = 'FINALIZE' if detach_pending else 'CONCURRENTLY'
+            await connection.execute(text(f'ALTER TABLE {table} DETACH PARTITION {partition} {mode}'))
+            await connection.execute(text(f'DROP TABLE {partition}'))
 
 
-@DatabaseConnector(connection_is_async=False)
-def add_uday_lessons(session: Session, lessons_list: List[Lesson]) -> None:
+async def _copy_records(session: AsyncSession, model: type[Base], columns: List[str], records: List[tuple]) -> None:
     """
-    Добавляет список уроков универ-дня в базу данных.
+    Массово записывает строки в таблицу модели в рамках текущей транзакции сессии.
+
+    Если соединение обслуживается asyncpg, строки передаются через COPY, иначе
+    выполняется многострочный INSERT.
 
     Параметры:
-        session (Session): Сессия для работы с базой данных.
-        lessons_list (List[Lesson]): Список объектов уроков универ-дня для добавления.
+        session (AsyncSession): Сессия для работы с базой данных.
+        model (type[Base]): Модель, в таблицу которой записываются строки.
+        columns (List[str]): Названия столбцов в порядке значений в строках.
+        records (List[tuple]): Записываемые строки.
 
     Возвращает:
         None: функция ничего не возвращает.
     """
-    lessons_to_save = [Uday_schedule(lesson_number=lesson.num, lesson_info=lesson.info, date=lesson.date,
-                       uday_group=lesson.group_num) for lesson in lessons_list]
+    if not records:
+        return
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    if hasattr(driver_connection, 'copy_records_to_table'):
+        await driver_connection.copy_records_to_table(model.__tablename__, records=records, columns=columns)
+    else:
+        await session.execute(insert(model), [dict(zip(columns, record)) for record in records])
+
+
+@DatabaseConnector()
+async def publish_schedule(session: AsyncSession, date: date, regular_lessons: List[Lesson],
+                           uday_lessons: List[Lesson], rendered: Dict[Tuple[str, int, int], str],
+                           file_hash: str | None = None, lessons_hash: str | None = None) -> int:
+    """
+    Записывает новую версию расписания на заданную дату вместе с готовыми текстами расписания и публикует её.
+
+    Уроки записываются отдельной транзакцией в новую версию, невидимую пользователям, после чего
+    короткая транзакция переключает указатель опубликованного расписания на неё. Предыдущая версия
+    остаётся доступной до момента переключения и удаляется позже сборщиком устаревших версий.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        date (date): Дата расписания.
+        regular_lessons (List[Lesson]): Список обычных уроков.
+        uday_lessons (List[Lesson]): Список уроков универ-дня.
+        rendered (Dict[Tuple[str, int, int], str]): Готовые тексты расписания по ключам
+                                                    (класс, группа класса, группа универ-дня).
+        file_hash (str | None): Хэш загруженного файла расписания.
+        lessons_hash (str | None): Хэш набора уроков расписания.
+
+    Возвращает:
+        int: Идентификатор опубликованной версии.
+    """
+    version = Schedule_version(date=date, file_hash=file_hash, lessons_hash=lessons_hash)
+    session.add(version)
+    await session.flush()
+
+    await _copy_records(session, Regular_schedule,
+                        ['lesson_number', 'lesson_info', 'date', 'class_letter', 'class_group', 'version_id'],
+                        [(lesson.num, lesson.info, lesson.date, lesson.class_letter, lesson.group_num, version.id)
+                         for lesson in regular_lessons])
+    await _copy_records(session, Uday_schedule,
+                        ['lesson_number', 'lesson_info', 'date', 'uday_group', 'version_id'],
+                        [(lesson.num, lesson.info, lesson.date, lesson.group_num, version.id)
+                         for lesson in uday_lessons])
+    await _copy_records(session, Rendered_schedule,
+                        ['version_id', 'class_letter', 'class_group', 'uday_group', 'text'],
+                        [(version.id, *key, text) for key, text in rendered.items()])
+    await session.commit()
+
+    # Переключаем указатель на новую версию
+    await session.merge(Published_schedule(date=date, version_id=version.id))
+    await session.commit()
+    published_dates.add(date)
+
+    # Чтения текстов на эту дату направляются на основную бд до сброса кэша, чтобы в него не попал текст с реплики
+    mark_recent_write(date)
+    schedules_cache.invalidate_matching(lambda key: key[0] == date)
+    await publish_invalidation('published', date)
+    return version.id
+
+
+@DatabaseConnector()
+async def update_published_schedule(session: AsyncSession, version_id: int, date: date, diff: ScheduleDiff,
+                                    regular_lessons: List[Lesson], uday_lessons: List[Lesson],
+                                    rendered: Dict[Tuple[str, int, int], str], file_hash: str | None = None,
+                                    lessons_hash: str | None = None) -> None:
+    """
+    Изменяет опубликованную версию расписания на месте одной транзакцией: перезаписывает уроки только
+    изменившихся групп классов и групп универ-дня и готовые тексты только изменившихся сочетаний групп.
+
+    Параметры:
+        session (AsyncSession): Сессия для работы с базой данных.
+        version_id (int): Идентификатор опубликованной версии.
+        date (date): Дата расписания.
+        diff (ScheduleDiff): Изменения нового расписания относительно опубликованного.
+        regular_lessons (List[Lesson]): Список обычных уроков нового расписания.
+        uday_lessons (List[Lesson]): Список уроков универ-дня нового расписания.
+        rendered (Dict[Tuple[str, int, int], str]): Готовые тексты нового расписания по ключам из schedule_key.
+        file_hash (str | None): Хэш загруженного файла расписания.
+        lessons_hash (str | None): Хэш набора уроков расписания.
+
+    Возвращает:
+        None: Функция ничего не возвращает.
+    """
+    if diff.classes:
+        await session.execute(delete(Regular_schedule).where(
+            Regular_schedule.version_id == version_id, Regular_schedule.date == date,
+            tuple_(Regular_schedule.class_letter, Regular_schedule.class_group).in_(list(diff.classes))))
+        await _copy_records(session, Regular_schedule,
+                            ['lesson_number', 'lesson_info', 'date', 'class_letter', 'class_group', 'version_id'],
+                            [(lesson.num, lesson.info, lesson.date, lesson.class_letter, lesson.group_num, version_id)
+                             for lesson in regular_lessons if (lesson.class_letter, lesson.group_num) in diff.classes])
+    if diff.uday_groups:
+        await session.execute(delete(Uday_schedule).where(
+            Uday_schedule.version_id == version_id, Uday_schedule.date == date,
+            Uday_schedule.uday_group.in_(list(diff.uday_groups))))
+        await _copy_records(session, Uday_schedule,
+                            ['lesson_number', 'lesson_info', 'date', 'uday_group', 'version_id'],
+                            [(lesson.num, lesson.info, lesson.date, lesson.group_num, version_id)
+                             for lesson in uday_lessons if lesson.group_num in diff.uday_groups])
+    if diff.summaries:
+        await session.execute(delete(Rendered_schedule).where(
+            Rendered_schedule.version_id == version_id,
+            tuple_(Rendered_schedule.class_letter, Rendered_schedule.class_group,
+                   Rendered_schedule.uday_group).in_(list(diff.summaries))))
+        await _copy_records(session, Rendered_schedule,
+                            ['version_id', 'class_letter', 'class_group', 'uday_group', 'text'],
+                            [(version_id, *key, rendered[key]) for key in diff.summaries if key in rendered])
+    await session.execute(update(Schedule_version).where(Schedule_version.id == version_id)
+                          .values(file_hash=file_hash, lessons_hash=lessons_hash))
+    await session.commit()
 
-    session.add_all(lessons_to_save)
-    session.commit()
+    mark_recent_write(date)
+    schedules_cache.invalidate_matching(lambda key: key[0] == date)
+    await publish_invalidation('published', date)
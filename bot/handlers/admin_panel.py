@@ -10,10 +10,11 @@ from bot.keyboards.admin_panel_keyboards import *
 from bot.middlewares.album_middlleware import AlbumMiddleware
 from bot.middlewares.admin_filter import AdminAccessMiddleware
 
-from bot.misc.parsing import Parser
+from bot.misc.parsing import parse_schedule_async, notify_schedule_changes
 from bot.misc.states import AdminPanelPages
 
-from bot.db.requests import get_users, get_all_users, delete_user
+from bot.db.requests import iter_users, count_users, delete_users_bulk, warm_up_schedule_cache
+from bot.config import local_today
 
 
 import datetime as dt
@@ -55,12 +56,8 @@ async def admin_panel_back(callback: CallbackQuery, state: FSMContext) -> None:
     """
     # Удаляем сообщения с запросом подтверждения рассылки, если они есть
     notification_data = await state.get_data()
-    messages_to_delete = notification_data.get('to_delete')
-    if isinstance(messages_to_delete, Message):
-        await messages_to_delete.delete()
-    elif messages_to_delete:
-        for message in messages_to_delete:
-            await message.delete()
+    for message_id in notification_data.get('to_delete', []):
+        await callback.bot.delete_message(chat_id=callback.message.chat.id, message_id=message_id)
     # Отправляем админ-панель, удалив при необходимости сообщение для рассылки
     if callback.message.content_type == ContentType.TEXT:
         await callback.message.edit_text(text='Добро пожаловать в админ-панель!', reply_markup=admin_panel_kb())
@@ -147,10 +144,12 @@ async def notification_message_confirm(message: Message, state: FSMContext, albu
             elif ms.video:
                 album_builder.add_video(media=ms.video.file_id)
 
-        # Собираем альбом и отправляем его, сохраняем информаию об альбоме в состоянии
+        # Собираем альбом и отправляем его, сохраняем информаию об альбоме в состоянии, храня в нём только
+        # идентификаторы, чтобы состояние можно было сериализовать в Redis
         album = album_builder.build()
         msg = await message.answer_media_group(media=album, caption=notification_text)
-        await state.update_data(to_delete=msg, content_type='album', file_id=album)
+        await state.update_data(to_delete=[ms.message_id for ms in msg], content_type='album',
+                                file_id=[{'type': media.type, 'media': media.media} for media in album])
         await message.answer(text=default_caption, reply_markup=notification_confirmation_kb())
 
     else:
@@ -185,7 +184,8 @@ async def notification_message_confirm(message: Message, state: FSMContext, albu
 
             case ContentType.VIDEO_NOTE:
                 msg = await message.answer_video_note(video_note=message.video_note.file_id)
-                await state.update_data(to_delete=msg, content_type='video_note', file_id=message.video_note.file_id)
+                await state.update_data(to_delete=[msg.message_id], content_type='video_note',
+                                        file_id=message.video_note.file_id)
                 await message.answer(text=message_caption, reply_markup=notification_confirmation_kb())
 
             case ContentType.VOICE:
@@ -217,27 +217,30 @@ async def notifaction_start(callback: CallbackQuery, state: FSMContext, bot: Bot
     notification_data = await state.get_data()
 
     # Удаляем сообщение(я) подтверждения рассылки
-    messages_to_delete = notification_data.get('to_delete')
     await callback.message.delete()
-
-    if isinstance(messages_to_delete, Message):
-        await messages_to_delete.delete()
-    elif messages_to_delete:
-        for message in messages_to_delete:
-            await message.delete()
+    for message_id in notification_data.get('to_delete', []):
+        await bot.delete_message(chat_id=callback.message.chat.id, message_id=message_id)
 
     recievers = notification_data.get('recievers')
     notification_text = notification_data.get('text')
     content_type, file_id = notification_data.get('content_type'), notification_data.get('file_id')
 
-    # Определяем номер класса и получаем список студентов, уведомляем админа о начале рассылки
-    cl_num = recievers.split()[0]
-    students = await get_users(cl_num) if recievers != 'все классы' else await get_all_users()
+    # Восстанавливаем альбом из сохранённых в состоянии идентификаторов файлов
+    if content_type == 'album':
+        album_builder = MediaGroupBuilder(caption=notification_text)
+        for media in file_id:
+            album_builder.add(type=media['type'], media=media['media'])
+        file_id = album_builder.build()
+
+    # Определяем номер класса и количество студентов, уведомляем админа о начале рассылки
+    cl_num = recievers.split()[0] if recievers != 'все классы' else None
+    rows_num = await count_users(cl_num)
     msg = await callback.message.answer(text='рассылка в процессе\n' + '⬜️' * 10)
-    rows_num = len(students)
 
-    # Отправляем соответствующее сообщение в зависимости от типа контента
-    for counter, student_id in enumerate(students, start=1):
+    # Отправляем соответствующее сообщение в зависимости от типа контента, получая студентов из бд порциями
+    counter, blocked_ids = 0, []
+    async for student_id in iter_users(cl_num):
+        counter += 1
         try:
             match content_type:
                 case 'text':
@@ -255,16 +258,19 @@ async def notifaction_start(callback: CallbackQuery, state: FSMContext, bot: Bot
                 case 'album':
                     await bot.send_media_group(chat_id=student_id, media=file_id)
 
-        # Удаляем пользователя из базы данных, если тот заблокировал бота
+        # Запоминаем пользователя, если тот заблокировал бота
         except TelegramForbiddenError:
-            await delete_user(student_id)
+            blocked_ids.append(student_id)
 
-        percent = int(counter / rows_num * 100) // 10
+        # Пользователи могли зарегистрироваться после подсчёта, в том числе когда их было 0
+        percent = min(int(counter / max(rows_num, 1) * 100) // 10, 10)
         await msg.edit_text(text=f'рассылка в процессе\n{"🟩" * percent}{"⬜️" * (10 - percent)} {counter}/{rows_num}')
 
         # Задержка для избежения нарушения ограничений телеграма
         await asyncio.sleep(0.035)
 
+    # Удаляем из базы данных всех заблокировавших бота пользователей одним запросом
+    await delete_users_bulk(blocked_ids)
     await msg.edit_text(text='Рассылка завершена✅')
 
 
@@ -287,35 +293,48 @@ async def schedule_file_parsing(message: Message, state: FSMContext, bot: Bot) -
     # Проверяем, что сообщение содержит документ и файл имеет правильный формат
     if message.document and message.document.file_name.endswith('.xlsx'):
         file_name = message.document.file_name
-        await bot.download(message.document.file_id, destination=f'./bot/uploads/{file_name}')
-        parser = Parser(file_name)
-        parsing_result = parser.parse()
+        content = await bot.download(message.document.file_id)
+        msg = await message.answer(text='файл получен 📥')
+
+        # Парсим файл вне цикла событий, сообщая админу о ходе загрузки
+        parsing_result, parsed = await parse_schedule_async(file_name, content,
+                                                       progress=lambda text: msg.edit_text(text=text))
 
         # Отправляем результат парсинга админу
-        await message.answer(text=parsing_result)
+        await msg.edit_text(text=parsing_result)
 
         # Если парсинг прошел успешно, запускаем оповещение
-        if parsing_result == 'Расписание сохранено успешно!':
-            students = await get_all_users()
+        if parsing_result in ('Расписание сохранено успешно!', 'Расписание обновлено успешно!'):
+            # Заполняем кэш расписаний до рассылки, чтобы не нагружать бд запросами учеников
+            await warm_up_schedule_cache(parsed.date)
 
             # Определяем день, на который загружено расписание
-            if parser.date == dt.datetime.today().date():
+            if parsed.date == local_today():
                 day = 'сегодня'
-            elif parser.date == dt.datetime.today().date() + dt.timedelta(days=1):
+            elif parsed.date == local_today() + dt.timedelta(days=1):
                 day = 'завтра'
             else:
-                day = parser.date.strftime('%d.%m')
+                day = parsed.date.strftime('%d.%m')
+
+            # При обновлении уведомляем только учеников, чьё расписание изменилось
+            if parsed.changes is not None:
+                await notify_schedule_changes(bot, parsed, day)
 
             # Уведомляем учеников о загрузке расписании
-            for student_id in students:
-                try:
-                    await bot.send_message(chat_id=student_id, text=f'загружено расписание на {day}🗓')
+            else:
+                blocked_ids = []
+                async for student_id in iter_users():
+                    try:
+                        await bot.send_message(chat_id=student_id, text=f'загружено расписание на {day}🗓')
+
+                    except TelegramForbiddenError:
+                        blocked_ids.append(student_id)
 
-                except TelegramForbiddenError:
-                    await delete_user(student_id)
+                    # Задержка для избежения нарушения ограничений телеграма
+                    await asyncio.sleep(0.035)
 
-                # Задержка для избежения нарушения ограничений телеграма
-                await asyncio.sleep(0.035)
+                # Удаляем из базы данных всех заблокировавших бота пользователей одним запросом
+                await delete_users_bulk(blocked_ids)
 
     else:
         await message.answer(text='Файл с расписанием должен быть формата .xlsx, попробуйте снова',
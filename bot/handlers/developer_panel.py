@@ -9,10 +9,14 @@ from bot.keyboards.admin_panel_keyboards import *
 
 from bot.middlewares.admin_filter import AdminAccessMiddleware
 
-from bot.db.requests import get_users, set_admin, get_admins
+from bot.db.requests import get_users_stats, set_admin, get_admins
+from bot.db.metrics import get_query_stats
+from bot.db.cache import users_cache, schedules_cache
 
 from bot.misc.states import DevPanelStates
 
+from collections import Counter
+
 import datetime as dt
 import sys
 
@@ -72,9 +76,8 @@ async def logs_stats(callback: CallbackQuery) -> None:
 @router.callback_query(F.data == 'stats')
 async def users_stats(callback: CallbackQuery) -> None:
     """
-    Отправляет данные об общем количестве пользователей бота и их распределении по классам.
-
-    Отправляет главную страницу админ-панели.
+    Отправляет данные об общем количестве пользователей бота и их распределении по классам,
+    группам классов и группам универ-дня. Все данные считаются одним агрегирующим запросом к бд.
 
     Аргументы:
         callback (CallbackQuery): Объект обратного вызова с данными о запросе.
@@ -83,11 +86,45 @@ async def users_stats(callback: CallbackQuery) -> None:
         None: Функция ничего не возвращает.
     """
     await callback.message.delete()
-    ten_class_users = len(await get_users('10'))
-    eleven_class_users = len(await get_users('11'))
+    class_nums, class_letters, class_groups, uday_groups = Counter(), Counter(), Counter(), Counter()
+    for class_letter, class_group, uday_group, count in await get_users_stats():
+        class_num = class_letter.split()[0]
+        class_nums[class_num] += count
+        class_letters[class_letter] += count
+        class_groups[class_letter, class_group] += count
+        uday_groups[class_num, uday_group] += count
+
+    classes_info = '\n'.join(f'{letter}: {count} (А: {class_groups[letter, 0]}, Б: {class_groups[letter, 1]})'
+                              for letter, count in sorted(class_letters.items()))
+    uday_info = '\n'.join(f'{num} кл., группа {group}: {count}' for (num, group), count in sorted(uday_groups.items()))
     await callback.message.answer(text=f'статистика по пользователям бота 📈\nпользователей всего:'
-                                       f' {ten_class_users + eleven_class_users}\nучеников 10-х классов:'
-                                       f' {ten_class_users}👩🏼‍💻\nучеников 11-х классов: {eleven_class_users}🧑🏼‍💻')
+                                       f' {class_nums.total()}\nучеников 10-х классов:'
+                                       f' {class_nums["10"]}👩🏼‍💻\nучеников 11-х классов: {class_nums["11"]}🧑🏼‍💻'
+                                       f'\n\nпо классам:\n{classes_info}\n\nпо группам универдня:\n{uday_info}')
+
+
+@router.callback_query(F.data == 'db_stats')
+async def db_stats(callback: CallbackQuery) -> None:
+    """
+    Отправляет статистику запросов к базе данных: количество вызовов и ошибок, перцентили
+    длительности выполнения и ожидания соединения из пула для каждой функции запроса,
+    а также статистику кэшей перед базой данных.
+
+    Аргументы:
+        callback (CallbackQuery): Объект обратного вызова с данными о запросе.
+
+    Возвращает:
+        None: Функция ничего не возвращает.
+    """
+    await callback.message.delete()
+    query_stats = sorted(get_query_stats().items(), key=lambda item: item[1]['p95_ms'], reverse=True)
+    lines = [f'{name}: {stats["calls"]} выз., {stats["errors"]} ош.\n'
+             f'p50 {stats["p50_ms"]:.0f} / p95 {stats["p95_ms"]:.0f} / p99 {stats["p99_ms"]:.0f} мс, '
+             f'ожидание пула p95 {stats["checkout_p95_ms"]:.0f} мс' for name, stats in query_stats]
+    for cache_name, cache in (('пользователей', users_cache), ('расписаний', schedules_cache)):
+        cache_stats = cache.stats()
+        lines.append(f'кэш {cache_name}: {cache_stats["size"]} записей, попаданий {cache_stats["hit_rate"]:.0%}')
+    await callback.message.answer(text='статистика запросов к бд 🗄\n\n' + '\n\n'.join(lines))
 
 
 @router.callback_query(F.data == 'add_admin')
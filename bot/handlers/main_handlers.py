@@ -7,9 +7,10 @@ from bot.keyboards.main_keyboards import *
 
 from bot.middlewares.throttling import ThrottlingMiddleware
 
-from bot.db.requests import check_schedule_existence, get_user, get_user_schedule, delete_user
+from bot.db.requests import check_schedule_existence, get_user, get_schedule_text, delete_user
 
 from bot.misc.states import RegistrationSteps
+from bot.config import local_today
 
 import datetime as dt
 
@@ -58,9 +59,9 @@ async def schedule_day_choose(message: Message) -> None:
     Возвращает:
         None: Функция ничего не возвращает.
     """
-    today = dt.datetime.today().date()
+    today = local_today()
     tomorrow = today + dt.timedelta(days=1)
-    today_flag, tomorrow_flag = await check_schedule_existence(today, tomorrow)
+    today_flag, tomorrow_flag = check_schedule_existence(today, tomorrow)
     if today_flag or tomorrow_flag:
         await message.answer('выбери интересующий день👇',
                              reply_markup=day_choose_kb(today_flag, tomorrow_flag, today, tomorrow))
@@ -72,8 +73,8 @@ async def schedule_day_choose(message: Message) -> None:
 async def get_schedule(callback: CallbackQuery) -> None:
     """
     Обрабатывает запрос на получение расписания по выбранной дате.
-    Извлекает из базы данных расписание в соответствие с данными пользователя и
-    выбранной датой.
+    Получает готовый текст расписания в соответствие с данными пользователя и выбранной датой
+    из кэша или базы данных.
 
     Аргументы:
         callback (CallbackQuery): Объект обратного вызова, содержащий данные о выбранной дате.
@@ -83,8 +84,11 @@ async def get_schedule(callback: CallbackQuery) -> None:
     """
     date = dt.datetime.strptime(callback.data.split('=')[1], '%d%m%y').date()
     user = await get_user(callback.from_user.id)
-    lessons = await get_user_schedule(user.class_letter, user.class_group, user.uday_group, date)
-    await callback.message.edit_text(text='\n\n'.join(lessons))
+    if not user:
+        await callback.message.edit_text(text='расписание не найдено')
+        return
+    text = await get_schedule_text(date, user.class_letter, user.class_group, user.uday_group)
+    await callback.message.edit_text(text=text or 'расписание не найдено')
 
 
 @router.my_chat_member(ChatMemberUpdatedFilter(member_status_changed=KICKED))
@@ -98,5 +102,5 @@ async def process_user_blocked_bot(event: ChatMemberUpdated):
     Возвращает:
         None: Функция ничего не возвращает.
     """
-    if get_user(event.from_user.id):
+    if await get_user(event.from_user.id):
         await delete_user(event.from_user.id)
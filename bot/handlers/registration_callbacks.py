@@ -32,7 +32,7 @@ async def start(message: Message, state: FSMContext) -> None:
         None: Функция ничего не возвращает.
     """
     # Если пользователь админ или разработчик, приветствуем и отправляем клавиатуру выбора панели
-    if await is_admin(message.from_user.id):
+    if is_admin(message.from_user.id):
         await message.answer(text=f'Здравствуйте, {message.from_user.first_name}! Вы являетесь администратором данного '
                                   f'бота и можете загружать расписание или запускать рассылку уведомлений, для этого '
                                   f'воспользуйтесь админ-панелью',
@@ -55,6 +55,7 @@ def developer_panel_kb() -> InlineKeyboardMarkup:
     kb = InlineKeyboardBuilder()
     kb.button(text='логи 💾', callback_data='logs')
     kb.button(text='статистика 📊', callback_data='stats')
+    kb.button(text='запросы к бд 🗄', callback_data='db_stats')
     kb.button(text='назначить админа 👨🏻‍💼', callback_data='add_admin')
     kb.button(text='остановить бота ⛔️', callback_data='stop_bot')
     kb.adjust(1)
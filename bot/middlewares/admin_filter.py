@@ -10,7 +10,8 @@ class AdminAccessMiddleware(BaseMiddleware):
     """
     Middleware для ограничения доступа к определенным модулям только для администраторов.
 
-    Этот класс проверяет, является ли пользователь администратором, основываясь на его ID.
+    Этот класс проверяет, является ли пользователь администратором, основываясь на его ID
+    и множестве идентификаторов администраторов в памяти, без обращения к базе данных.
     Если пользователь не является администратором, обработчик не будет вызван.
 
     Атрибуты:
@@ -40,7 +41,7 @@ class AdminAccessMiddleware(BaseMiddleware):
             Any: Возвращает результат вызова обработчика, если пользователь - администратор, иначе возвращает None.
         """
         # Проверяем, является ли пользователь админом
-        if not await is_admin(message.from_user.id):
+        if not is_admin(message.from_user.id):
 
             # Если пользователь не администратор, прерываем выполнение
             return None
@@ -3,8 +3,13 @@ from cachetools import TTLCache
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message
 
+from bot.db.broker import get_redis
 
-CACHE = TTLCache(maxsize=400, ttl=4)
+
+# Время жизни счётчика запросов пользователя в секундах
+THROTTLING_WINDOW = 4
+
+CACHE = TTLCache(maxsize=400, ttl=THROTTLING_WINDOW)
 
 
 class ThrottlingMiddleware(BaseMiddleware):
@@ -13,17 +18,45 @@ class ThrottlingMiddleware(BaseMiddleware):
 
     Этот middleware ограничивает количество запросов, которые пользователь может
     отправлять в определённый промежуток времени. При превышении лимита запросов
-    пользователю отправляется уведомление с просьбой подождать.
+    пользователю отправляется уведомление с просьбой подождать. Если задан REDIS_URL,
+    счётчики хранятся в Redis и общие для всех процессов бота.
 
     Атрибуты:
-        CACHE (dict): Словарь для хранения количества запросов от каждого пользователя.
+        CACHE (dict): Словарь для хранения количества запросов от каждого пользователя без Redis.
 
     Методы:
+        count_request(user_id: int) -> int: Учитывает запрос и возвращает количество предыдущих запросов.
         __call__(handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
                  message: Message,
                  data: Dict[str, Any]): Обработчик входящих сообщений.
     """
 
+    async def count_request(self, user_id: int) -> int:
+        """
+        Увеличивает счётчик запросов пользователя и возвращает его значение до увеличения.
+
+        Аргументы:
+            user_id (int): Telegram ID пользователя.
+
+        Возвращает:
+            int: Количество запросов пользователя за текущее окно до этого запроса.
+        """
+        redis = get_redis()
+        if redis is not None:
+            key = f'throttling:{user_id}'
+
+            # Счётчик создаётся сразу со временем жизни одной транзакцией, поэтому не может остаться без него
+            async with redis.pipeline(transaction=True) as pipe:
+                _, count = await pipe.set(key, 0, ex=THROTTLING_WINDOW, nx=True).incr(key).execute()
+            return count - 1
+
+        current_count = CACHE.get(user_id, 0)
+
+        # Не продлеваем окно, пока пользователь игнорируется
+        if current_count <= 1:
+            CACHE[user_id] = current_count + 1
+        return current_count
+
     async def __call__(
             self,
             handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
@@ -47,17 +80,13 @@ class ThrottlingMiddleware(BaseMiddleware):
             Any | None: Результат выполнения обработчика, если запрос не превышает лимит, иначе None.
         """
 
-        # Получаем счётчик сообщений для пользователя
-        user_id = message.from_user.id
-        current_count = CACHE.get(user_id, 0)
+        # Получаем счётчик сообщений для пользователя и увеличиваем его на 1
+        current_count = await self.count_request(message.from_user.id)
 
         # Если счётчик превышает 1 - игнорируем запрос
         if current_count > 1:
             return None
 
-        # Увеличиваем счётчик на 1 при запросе
-        CACHE[user_id] = current_count + 1
-
         # Предупреждаем пользователя при превышении лимита
         if current_count == 1:
             await message.answer(text='подождите 5 секунд и повторите запрос')
@@ -0,0 +1,96 @@
+from .lesson import Lesson
+from .rendering import schedule_views
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+from datetime import date
+
+
+@dataclass
+class ScheduleDiff:
+    """
+    Датакласс изменений нового расписания относительно опубликованного на ту же дату
+    """
+    classes: Set[Tuple[str, int]]
+    uday_groups: Set[int]
+    summaries: Dict[Tuple[str, int, int], str]
+
+
+def _lessons_by_group(lessons: List[Lesson], regular: bool) -> Dict[Tuple[str, int] | int, Set[Tuple[int, str]]]:
+    """
+    Группирует уроки по группе класса или по группе универ-дня.
+
+    Аргументы:
+        lessons (List[Lesson]): Список уроков.
+        regular (bool): Обычные ли это уроки, иначе уроки универ-дня.
+
+    Возвращает:
+        Dict[Tuple[str, int] | int, Set[Tuple[int, str]]]: Номера и тексты уроков по группам.
+    """
+    groups = defaultdict(set)
+    for lesson in lessons:
+        groups[(lesson.class_letter, lesson.group_num) if regular else lesson.group_num].add((lesson.num, lesson.info))
+    return groups
+
+
+def _changed_groups(old: Dict, new: Dict) -> Set:
+    """
+    Возвращает группы, уроки которых отличаются в старом и новом расписании.
+
+    Аргументы:
+        old (Dict): Уроки опубликованного расписания по группам.
+        new (Dict): Уроки нового расписания по группам.
+
+    Возвращает:
+        Set: Изменившиеся группы.
+    """
+    return {group for group in old.keys() | new.keys() if old.get(group) != new.get(group)}
+
+
+def summarize_changes(old_lessons: List[str], new_lessons: List[str]) -> str:
+    """
+    Составляет краткое описание изменений в расписании пользователя: новые и изменённые уроки целиком
+    и время отменённых уроков.
+
+    Аргументы:
+        old_lessons (List[str]): Тексты уроков опубликованного расписания.
+        new_lessons (List[str]): Тексты уроков нового расписания.
+
+    Возвращает:
+        str: Описание изменений.
+    """
+    changed = [lesson for lesson in new_lessons if lesson not in old_lessons]
+    changed_times = {lesson.split('\n')[0] for lesson in changed}
+    cancelled = [lesson.split('\n')[0] for lesson in old_lessons
+                 if lesson not in new_lessons and lesson.split('\n')[0] not in changed_times]
+    parts = changed[:]
+    if cancelled:
+        parts.append('отменено: ' + ', '.join(cancelled))
+    return '\n\n'.join(parts) or 'изменён порядок уроков'
+
+
+def diff_schedules(old_regular: List[Lesson], old_uday: List[Lesson], new_regular: List[Lesson],
+                   new_uday: List[Lesson], date: date) -> ScheduleDiff:
+    """
+    Сравнивает новое расписание с опубликованным по группам классов и группам универ-дня.
+
+    Аргументы:
+        old_regular (List[Lesson]): Обычные уроки опубликованного расписания.
+        old_uday (List[Lesson]): Уроки универ-дня опубликованного расписания.
+        new_regular (List[Lesson]): Обычные уроки нового расписания.
+        new_uday (List[Lesson]): Уроки универ-дня нового расписания.
+        date (date): Дата расписания.
+
+    Возвращает:
+        ScheduleDiff: Изменившиеся группы классов, группы универ-дня и описания изменений
+                      по ключам из schedule_key.
+    """
+    classes = _changed_groups(_lessons_by_group(old_regular, True), _lessons_by_group(new_regular, True))
+    uday_groups = _changed_groups(_lessons_by_group(old_uday, False), _lessons_by_group(new_uday, False))
+
+    old_views = schedule_views(old_regular, old_uday, date)
+    new_views = schedule_views(new_regular, new_uday, date)
+    summaries = {key: summarize_changes(old_views.get(key, []), new_views.get(key, []))
+                 for key in old_views.keys() | new_views.keys() if old_views.get(key) != new_views.get(key)}
+    return ScheduleDiff(classes=classes, uday_groups=uday_groups, summaries=summaries)
@@ -0,0 +1,184 @@
+from openpyxl.utils.cell import range_boundaries
+
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple
+from io import BytesIO
+from xml.etree import ElementTree
+
+import posixpath
+import openpyxl
+import zipfile
+
+
+# Область страниц, в которой находятся расписания 10-х и 11-х классов
+GRID_MAX_ROW = 16
+GRID_MAX_COL = 27
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+class SheetGrid:
+    """
+    Класс прямоугольной области страницы эксель файла со значениями клеток.
+
+    Объединённые клетки имеют значение левой верхней клетки своего диапазона, пустые клетки - None.
+
+    Атрибуты:
+        title (str): Название страницы.
+        values (Dict[Tuple[int, int], Any]): Непустые значения клеток по их строке и столбцу.
+
+    Методы:
+        from_rows(title, rows, merged_ranges): Создаёт область из строк значений и объединённых диапазонов.
+        value(row, col): Возвращает значение клетки.
+        column(col, min_row, max_row): Возвращает значения клеток столбца.
+        iter_cols(min_row, min_col, max_row, max_col): Итерируется по столбцам области.
+    """
+    def __init__(self, title: str, values: Dict[Tuple[int, int], Any]) -> None:
+        """
+        Конструктор класса.
+
+        Аргументы:
+            title (str): Название страницы.
+            values (Dict[Tuple[int, int], Any]): Непустые значения клеток по их строке и столбцу.
+
+        Возвращает:
+            None: Метод ничего не возвращает.
+        """
+        self.title = title
+        self.values = values
+
+    @classmethod
+    def from_rows(cls, title: str, rows: Iterable[Tuple[Any, ...]],
+                  merged_ranges: Iterable[Tuple[int, int, int, int]]) -> 'SheetGrid':
+        """
+        Создаёт область из строк значений, начиная с первой строки и первого столбца, и переносит значения
+        объединённых клеток в клетки их диапазонов в пределах области.
+
+        Аргументы:
+            title (str): Название страницы.
+            rows (Iterable[Tuple[Any, ...]]): Строки значений клеток.
+            merged_ranges (Iterable[Tuple[int, int, int, int]]): Объединённые диапазоны в виде
+                                                                (min_col, min_row, max_col, max_row).
+
+        Возвращает:
+            SheetGrid: Область страницы.
+        """
+        values = {(row_num, col_num): value for row_num, row in enumerate(rows, 1)
+                  for col_num, value in enumerate(row, 1) if value is not None}
+        for min_col, min_row, max_col, max_row in merged_ranges:
+            parent = values.get((min_row, min_col))
+            if parent is None or min_row > GRID_MAX_ROW or min_col > GRID_MAX_COL:
+                continue
+            for row_num in range(min_row, min(max_row, GRID_MAX_ROW) + 1):
+                for col_num in range(min_col, min(max_col, GRID_MAX_COL) + 1):
+                    values[(row_num, col_num)] = parent
+        return cls(title, values)
+
+    def value(self, row: int, col: int) -> Any:
+        """
+        Возвращает значение клетки.
+
+        Аргументы:
+            row (int): Номер строки.
+            col (int): Номер столбца.
+
+        Возвращает:
+            Any: Значение клетки или None, если клетка пустая.
+        """
+        return self.values.get((row, col))
+
+    def column(self, col: int, min_row: int, max_row: int) -> List[Any]:
+        """
+        Возвращает значения клеток столбца с min_row по max_row включительно.
+
+        Аргументы:
+            col (int): Номер столбца.
+            min_row (int): Начальная строка.
+            max_row (int): Конечная строка.
+
+        Возвращает:
+            List[Any]: Значения клеток.
+        """
+        return [self.value(row, col) for row in range(min_row, max_row + 1)]
+
+    def iter_cols(self, min_row: int, min_col: int, max_row: int, max_col: int) -> Iterator[List[Any]]:
+        """
+        Итерируется по столбцам области, аналогично Worksheet.iter_cols с values_only=True.
+
+        Аргументы:
+            min_row (int): Начальная строка.
+            min_col (int): Начальный столбец.
+            max_row (int): Конечная строка.
+            max_col (int): Конечный столбец.
+
+        Возвращает:
+            Iterator[List[Any]]: Значения клеток каждого столбца.
+        """
+        for col in range(min_col, max_col + 1):
+            yield self.column(col, min_row, max_row)
+
+
+def read_merged_ranges(source: str | BinaryIO) -> Dict[str, List[Tuple[int, int, int, int]]]:
+    """
+    Читает объединённые диапазоны всех страниц напрямую из XML эксель файла, не загружая клетки страниц.
+
+    Аргументы:
+        source (str | BinaryIO): Путь к эксель файлу или открытый двоичный файл.
+
+    Возвращает:
+        Dict[str, List[Tuple[int, int, int, int]]]: Диапазоны в виде (min_col, min_row, max_col, max_row)
+                                                    по названиям страниц.
+    """
+    with zipfile.ZipFile(source) as archive:
+        rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{_PACKAGE_REL_NS}Relationship')}
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+
+        merged_ranges = {}
+        for sheet in workbook.iter(f'{_MAIN_NS}sheet'):
+            target = targets[sheet.get(f'{_REL_NS}id')]
+            sheet_path = target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+            ranges = []
+            with archive.open(sheet_path) as sheet_xml:
+                for _, element in ElementTree.iterparse(sheet_xml):
+                    if element.tag == f'{_MAIN_NS}mergeCell':
+                        ranges.append(range_boundaries(element.get('ref')))
+
+                    # Освобождаем память от уже прочитанных строк страницы
+                    elif element.tag == f'{_MAIN_NS}row':
+                        element.clear()
+            merged_ranges[sheet.get('name')] = ranges
+    return merged_ranges
+
+
+def load_sheet_grids(source: str | bytes | BinaryIO, read_only: bool = True) -> List[SheetGrid]:
+    """
+    Загружает области расписаний всех страниц эксель файла в порядке страниц.
+
+    В потоковом режиме файл открывается в режиме только для чтения, без создания объектов всех клеток
+    и их стилей, читаются только строки области, а объединённые диапазоны берутся из XML страниц.
+    В полном режиме файл загружается целиком, а диапазоны берутся из загруженных страниц.
+
+    Аргументы:
+        source (str | bytes | BinaryIO): Путь к эксель файлу, его содержимое или открытый двоичный файл.
+        read_only (bool): Использовать ли потоковый режим, по умолчанию True.
+
+    Возвращает:
+        List[SheetGrid]: Области страниц.
+    """
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    workbook = openpyxl.load_workbook(source, read_only=read_only)
+    try:
+        if read_only:
+            merged_ranges = read_merged_ranges(source)
+        else:
+            merged_ranges = {sheet.title: [merged.bounds for merged in sheet.merged_cells.ranges]
+                             for sheet in workbook.worksheets}
+        return [SheetGrid.from_rows(sheet.title, sheet.iter_rows(min_row=1, max_row=GRID_MAX_ROW, max_col=GRID_MAX_COL,
+                                                                 values_only=True),
+                                    merged_ranges.get(sheet.title, []))
+                for sheet in workbook.worksheets]
+    finally:
+        workbook.close()
@@ -1,75 +1,81 @@
-from bot.db.requests import add_regular_lessons, add_uday_lessons
-from bot.db.requests import delete_old_schedules, delete_repeated_schedule
-from bot.db.requests import get_all_users, delete_user
+from bot.db.requests import create_schedule_partitions, publish_schedule, collect_stale_versions
+from bot.db.requests import iter_users, delete_users_bulk, warm_up_schedule_cache, get_published_hashes
+from bot.db.requests import iter_user_profiles, get_published_lessons, update_published_schedule
+from bot.db.requests import set_published_file_hash
 
 
 from .lesson import Lesson
+from .rendering import render_schedules
+from .grid import SheetGrid, load_sheet_grids
+from .diff import ScheduleDiff, diff_schedules
+from .rendering import schedule_key
 
 from aiogram.exceptions import TelegramForbiddenError
 from aiogram import Bot
 
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.cell.cell import Cell, MergedCell
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Tuple
+from dataclasses import dataclass
 from requests import Session, post
-from typing import Union
+from dotenv import dotenv_values
 from bs4 import BeautifulSoup
 from re import findall
 
 import datetime as dt
-import openpyxl
+import multiprocessing
+import hashlib
+import zipfile
+import json
 import asyncio
 import logging
-import os
 
 
-class Parser:
-    def __init__(self, filename: str):
-        self.workbook = openpyxl.load_workbook(f'./bot/uploads/{filename}')
-        self.date = dt.datetime.strptime(f'{filename.split('.xlsx')[0]}{dt.date.today().year}', "%d.%m%Y").date()
-        self.weekday = self.date.weekday()
-        self.regular_lessons = []
-        self.uday_lessons = []
-        os.remove(f'./bot/uploads/{filename}')
+# Ссылки на фоновые задачи, чтобы они не были удалены сборщиком мусора до завершения
+_background_tasks = set()
 
-    def parent_of_merged_cell(self, cell: MergedCell) -> str:
-        """
-        Ищет родителя объединённой клетки таблицы.
+_parsing_executor: Executor | None = None
 
-        Аргументы:
-            cell (MergedCell): Объединённая клетка.
 
-        Возвращает:
-            str: Координаты родительской клетки.
-        """
-        sheet = cell.parent
-        child_coord = cell.coordinate
-        for merged in sheet.merged_cells.ranges:
-            if child_coord in merged:
-                return merged.start_cell.coordinate
+def schedule_date(filename: str) -> dt.date:
+    """
+    Определяет дату расписания по названию файла вида ДД.ММ.xlsx.
 
-    def cell_value(self, cell: Union[Cell, MergedCell]) -> str:
-        """
-        Возвращает значение клетки.
+    Аргументы:
+        filename (str): Название файла.
 
-        Функция проверяет тип клетки, возвращает её значение если это обычная клетка, ищет родительскую клетку
-        и возвращает её значение если клетка совмещённая.
+    Возвращает:
+        date: Дата расписания текущего года.
+    """
+    return dt.datetime.strptime(f'{filename.split('.xlsx')[0]}{dt.date.today().year}', "%d.%m%Y").date()
 
-        Аргументы:
-            cell Union[Cell, MergedCell]: Клетка с искомым значением.
 
-        Возвращает:
-            str: Значение клетки.
-        """
-        if isinstance(cell, openpyxl.cell.cell.Cell):
-            return cell.value
-        if isinstance(cell, openpyxl.cell.cell.MergedCell):
-            coord = self.parent_of_merged_cell(cell)
-            parent = cell.parent[coord]
-            return parent.value
-
-    def regular_classes_schedule_parsing(self, worksheet: openpyxl.worksheet.worksheet.Worksheet,
-                                         times_list: list, start_row: int, start_col: int, end_row: int,
-                                         end_col: int) -> None:
+def hash_lessons(regular_lessons: List[Lesson], uday_lessons: List[Lesson]) -> str:
+    """
+    Вычисляет хэш набора уроков, не зависящий от порядка уроков в файле.
+
+    Аргументы:
+        regular_lessons (List[Lesson]): Список обычных уроков.
+        uday_lessons (List[Lesson]): Список уроков универ-дня.
+
+    Возвращает:
+        str: Хэш SHA-256 в шестнадцатеричном виде.
+    """
+    normalized = [sorted((lesson.class_letter, lesson.group_num, lesson.num, lesson.info) for lesson in regular_lessons),
+                  sorted((lesson.group_num, lesson.num, lesson.info) for lesson in uday_lessons)]
+    return hashlib.sha256(json.dumps(normalized, ensure_ascii=False).encode()).hexdigest()
+
+
+class Parser:
+    def __init__(self, filename: str, content: bytes | BinaryIO, read_only: bool = True):
+        self.sheets = load_sheet_grids(content, read_only=read_only)
+        self.date = schedule_date(filename)
+        self.weekday = self.date.weekday()
+        self.regular_lessons = []
+        self.uday_lessons = []
+
+    def regular_classes_schedule_parsing(self, worksheet: SheetGrid, times_list: list, start_row: int,
+                                         start_col: int, end_row: int, end_col: int) -> None:
         """
         Парсит обычное расписание классов.
 
@@ -77,7 +83,7 @@ class Parser:
 
         Аргументы:
             date (date): Дата из файла с расписанием.
-            worksheet (Worksheet): Страница эксель файла.
+            worksheet (SheetGrid): Область страницы эксель файла.
             times_list (list): Список с таймингами уроков.
             start_row (int): Начальная строка итерации.
             start_col (int): Начальный столбец итерации.
@@ -88,16 +94,16 @@ class Parser:
             None: функция ничего не возвращает.
         """
         for col in worksheet.iter_cols(min_row=start_row, min_col=start_col, max_row=end_row, max_col=end_col):
-            class_letter = self.cell_value(col[0])
+            class_letter = col[0]
             groups = ('гр.А', 'гр.Б')
-            class_group = groups.index(''.join(self.cell_value(col[1]).split()))
-            for num, cell in enumerate(col[2:]):
-                if self.cell_value(cell):
-                    lesson_info = '\n'.join((times_list[num], '\n'.join(self.cell_value(cell).split('\n\n'))))
+            class_group = groups.index(''.join(col[1].split()))
+            for num, value in enumerate(col[2:]):
+                if value:
+                    lesson_info = '\n'.join((times_list[num], '\n'.join(value.split('\n\n'))))
                     self.regular_lessons.append(Lesson(num=num, info=lesson_info, date=self.date, group_num=class_group,
                                                 class_letter=class_letter))
 
-    def uday_groups_schedule_parsing(self, worksheet: Worksheet, times_list: list, start_row: int,
+    def uday_groups_schedule_parsing(self, worksheet: SheetGrid, times_list: list, start_row: int,
                                      start_col: int, end_row: int, end_col: int) -> None:
         """
         Парсит расписание для групп на универдень.
@@ -105,7 +111,7 @@ class Parser:
         Функция итерируется по столбцам и клеткам столбца, читает расписание и сохраняет его в базу данных.
 
         Аргументы:
-            worksheet (Worksheet): Страница эксель файла.
+            worksheet (SheetGrid): Область страницы эксель файла.
             times_list (list): Список с таймингами уроков.
             start_row (int): Начальная строка итерации.
             start_col (int): Начальный столбец итерации.
@@ -117,16 +123,16 @@ class Parser:
         """
         processed = set()
         for col in worksheet.iter_cols(min_row=start_row, min_col=start_col, max_row=end_row, max_col=end_col):
-            group_num = int(self.cell_value(col[0]).split()[0])
+            group_num = int(col[0].split()[0])
             if group_num in processed:
                 continue
             processed.add(group_num)
-            for num, cell in enumerate(col[1:]):
-                if self.cell_value(cell):
-                    lesson_info = '\n'.join((times_list[num], '\n'.join(self.cell_value(cell).split('\n\n'))))
+            for num, value in enumerate(col[1:]):
+                if value:
+                    lesson_info = '\n'.join((times_list[num], '\n'.join(value.split('\n\n'))))
                     self.uday_lessons.append(Lesson(num=num, info=lesson_info, date=self.date, group_num=group_num))
 
-    def uday_classes_schedule_parsing(self, worksheet: Worksheet, times_list: list, start_row: int,
+    def uday_classes_schedule_parsing(self, worksheet: SheetGrid, times_list: list, start_row: int,
                                       start_col: int, end_row: int, end_col: int) -> None:
         """
         Парсит расписание для классов на универдень.
@@ -135,7 +141,7 @@ class Parser:
 
         Аргументы:
             date (date): Дата из файла с расписанием.
-            worksheet (Worksheet): Страница эксель файла.
+            worksheet (SheetGrid): Область страницы эксель файла.
             times_list (list): Список с таймингами уроков.
             start_row (int): Начальная строка итерации.
             start_col (int): Начальный столбец итерации.
@@ -147,40 +153,32 @@ class Parser:
         """
         processed = set()
         for col in worksheet.iter_cols(min_row=start_row, min_col=start_col, max_row=end_row, max_col=end_col):
-            class_letter = self.cell_value(col[0])
+            class_letter = col[0]
             if class_letter in processed:
                 continue
             processed.add(class_letter)
-            for num, cell in enumerate(col[1:]):
-                if self.cell_value(cell):
-                    lesson_info = '\n'.join((times_list[num], '\n'.join(self.cell_value(cell).split('\n\n'))))
+            for num, value in enumerate(col[1:]):
+                if value:
+                    lesson_info = '\n'.join((times_list[num], '\n'.join(value.split('\n\n'))))
                     self.regular_lessons.append(Lesson(num=num, info=lesson_info, date=self.date, group_num=0,
                                                 class_letter=class_letter))
 
-    def parse(self) -> str:
+    def parse_lessons(self) -> str | None:
         """
         Парсит .xlsx файл с расписанием.
 
-        Удаляет при наличии устаревшие расписания из базы данных а также неактуальную версию расписания
-        при его повторной загрузке, вызывает функции для парсинга различных листов файла, сохраняет
-        информацию об уроках в атрибутах класса и вызывает функцию сохранения уроков в бд.
+        Вызывает функции для парсинга различных листов файла и сохраняет информацию об уроках в атрибутах
+        класса. Не обращается к базе данных, поэтому может выполняться в отдельном процессе.
 
         Аргументы:
             None: Метод не принимает аргументов.
 
         Возвращает:
-            str: Результат выполнения метода, сообщение об успехе или ошибке.
+            str | None: Сообщение об ошибке или None, если парсинг прошёл успешно.
         """
-        # Удаляем устаревшие расписаний
-        old_date = dt.date.today() - dt.timedelta(days=2)
-        delete_old_schedules(old_date)
-
-        # Удаляем расписания при повторной загрузке расписания
-        delete_repeated_schedule(self.date)
-
         # Определяем на какой странице чьё расписание
         sh_10, sh_11 = None, None
-        for i, sh in enumerate(self.workbook.sheetnames):
+        for i, sh in enumerate(sheet.title for sheet in self.sheets):
             if sh.strip() == '10':
                 sh_10 = i
             elif sh.strip() == '11':
@@ -192,17 +190,16 @@ class Parser:
         try:
             # Универ-день (понедельник)
             if self.weekday == 0:
-                sheet = self.workbook.worksheets[0] if not sh_10 else self.workbook.worksheets[sh_10]
-                times_10 = [self.cell_value(i).replace('\n', '') for i in sheet['c'][2:9] + sheet['c'][9:11]
-                            if self.cell_value(i)]
+                sheet = self.sheets[0] if not sh_10 else self.sheets[sh_10]
+                times_10 = [i.replace('\n', '') for i in sheet.column(3, 3, 9) + sheet.column(3, 10, 11) if i]
                 self.uday_groups_schedule_parsing(sheet, times_10[:6], 2, 4, 8, 27)
                 self.uday_classes_schedule_parsing(sheet, times_10[6:], 9, 4, 12, 27)
 
             # Все остальные дни недели
             else:
-                sheet = self.workbook.worksheets[1] if not isinstance(sh_10, int) else self.workbook.worksheets[sh_10]
-                ls_num = max([int(self.cell_value(i)) for i in sheet['B'][3:14] if str(self.cell_value(i)).isnumeric()])
-                times_10 = [self.cell_value(i).replace('\n', '') for i in sheet['c'][3:3 + ls_num]]
+                sheet = self.sheets[1] if not isinstance(sh_10, int) else self.sheets[sh_10]
+                ls_num = max([int(i) for i in sheet.column(2, 4, 14) if str(i).isnumeric()])
+                times_10 = [i.replace('\n', '') for i in sheet.column(3, 4, 3 + ls_num)]
                 self.regular_classes_schedule_parsing(sheet, times_10, 2, 4, 11, 23)
 
         except Exception as ex:
@@ -213,43 +210,265 @@ class Parser:
         try:
             # Универ-день (среда)
             if self.weekday == 2:
-                sheet = self.workbook.worksheets[0] if not sh_11 else self.workbook.worksheets[sh_11]
-                times_11 = [self.cell_value(i).replace('\n', '') for i in sheet['c'][3:9] + sheet['c'][10:12]
-                            if self.cell_value(i)]
+                sheet = self.sheets[0] if not sh_11 else self.sheets[sh_11]
+                times_11 = [i.replace('\n', '') for i in sheet.column(3, 4, 9) + sheet.column(3, 11, 12) if i]
                 self.uday_groups_schedule_parsing(sheet, times_11[:6], 3, 4, 9, 23)
                 self.uday_classes_schedule_parsing(sheet, times_11[6:], 10, 4, 13, 23)
 
             # Все остальные дни недели
             else:
-                sheet = self.workbook.worksheets[1] if not isinstance(sh_11, int) else self.workbook.worksheets[sh_11]
-                times_11 = [self.cell_value(i).replace('\n', '') for i in sheet['c'][3:11] if self.cell_value(i)]
+                sheet = self.sheets[1] if not isinstance(sh_11, int) else self.sheets[sh_11]
+                times_11 = [i.replace('\n', '') for i in sheet.column(3, 4, 11) if i]
                 self.regular_classes_schedule_parsing(sheet, times_11, 2, 4, 12, 23)
 
         except Exception as ex:
             logging.error(ex)
             return 'Ошибка при парсинге расписания 11-х классов!'
 
-        return self.saving_to_database()
+        return None
 
-    def saving_to_database(self) -> str:
+    def result(self, error: str | None = None) -> 'ParsedSchedule':
         """
-        Сохраняет уроки полученные в ходе парсинга в базу данных.
+        Возвращает результат парсинга с готовыми текстами расписания.
 
         Аргументы:
-            None: Метод не принимает аргументов.
+            error (str | None): Сообщение об ошибке парсинга, если она произошла.
 
         Возвращает:
-            str: Сообщение о результате сохранения расписания в базу данных.
+            ParsedSchedule: Результат парсинга.
         """
+        if error is not None:
+            return ParsedSchedule(date=self.date, regular_lessons=self.regular_lessons, uday_lessons=self.uday_lessons,
+                                  rendered={}, error=error)
+        return ParsedSchedule(date=self.date, regular_lessons=self.regular_lessons, uday_lessons=self.uday_lessons,
+                              rendered=render_schedules(self.regular_lessons, self.uday_lessons, self.date),
+                              lessons_hash=hash_lessons(self.regular_lessons, self.uday_lessons))
+
+
+@dataclass
+class ParsedSchedule:
+    """
+    Датакласс результата парсинга файла расписания, передаваемого из процесса парсинга
+    """
+    date: dt.date
+    regular_lessons: List[Lesson]
+    uday_lessons: List[Lesson]
+    rendered: Dict[Tuple[str, int, int], str]
+    error: str | None = None
+    file_hash: str | None = None
+    lessons_hash: str | None = None
+    changes: Dict[Tuple[str, int, int], str] | None = None
+
+
+def parse_schedule_file(filename: str, content: bytes) -> ParsedSchedule:
+    """
+    Загружает и парсит файл расписания из памяти. Выполняется в пуле процессов или потоков.
+
+    Аргументы:
+        filename (str): Название файла, из которого берётся дата расписания.
+        content (bytes): Содержимое файла.
+
+    Возвращает:
+        ParsedSchedule: Результат парсинга.
+    """
+    parser = Parser(filename, content)
+    return parser.result(parser.parse_lessons())
+
+
+def get_parsing_executor() -> Executor:
+    """
+    Возвращает общий пул для парсинга расписаний, создавая его при первом обращении.
+    Процесс парсинга запускается через forkserver или spawn, а не fork, чтобы не копировать
+    в него цикл событий, соединения с бд и Redis. Если пул процессов недоступен, используется пул потоков.
+
+    Аргументы:
+        None: Функция ничего не принимает.
+
+    Возвращает:
+        Executor: Пул процессов или потоков.
+    """
+    global _parsing_executor
+    if _parsing_executor is None:
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
         try:
-            add_regular_lessons(self.regular_lessons)
-            if self.uday_lessons:
-                add_uday_lessons(self.uday_lessons)
-        except Exception as ex:
-            return f'Ошибка при сохранении расписания в базу данных!\nОшибка:\n{ex}'
+            _parsing_executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context(method))
+        except (OSError, NotImplementedError):
+            _parsing_executor = ThreadPoolExecutor(max_workers=1)
+    return _parsing_executor
+
+
+def shutdown_parsing_executor() -> None:
+    """
+    Останавливает пул для парсинга расписаний, если он был создан.
+
+    Аргументы:
+        None: Функция ничего не принимает.
+
+    Возвращает:
+        None: Функция ничего не возвращает.
+    """
+    global _parsing_executor
+    if _parsing_executor is not None:
+        _parsing_executor.shutdown(wait=False, cancel_futures=True)
+        _parsing_executor = None
+
+
+async def save_parsed_schedule(schedule: ParsedSchedule) -> str:
+    """
+    Сохраняет уроки полученные в ходе парсинга и составленные из них готовые тексты расписания
+    в базу данных новой версией расписания и публикует её, после чего в фоне удаляет устаревшие версии.
+
+    Аргументы:
+        schedule (ParsedSchedule): Результат парсинга.
+
+    Возвращает:
+        str: Сообщение о результате сохранения расписания в базу данных.
+    """
+    try:
+        await create_schedule_partitions(schedule.date, months_ahead=0)
+        await publish_schedule(schedule.date, schedule.regular_lessons, schedule.uday_lessons, schedule.rendered,
+                               file_hash=schedule.file_hash, lessons_hash=schedule.lessons_hash)
+    except Exception as ex:
+        return f'Ошибка при сохранении расписания в базу данных!\nОшибка:\n{ex}'
+
+    task = asyncio.create_task(collect_stale_versions())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+    return 'Расписание сохранено успешно!'
+
+
+async def parse_schedule_async(filename: str, content: bytes | BinaryIO,
+                               progress: Callable[[str], Awaitable[Any]] | None = None
+                               ) -> Tuple[str, ParsedSchedule | None]:
+    """
+    Парсит файл расписания в пуле процессов, не блокируя цикл событий бота, и сохраняет его в бд.
+
+    Если файл или полученный из него набор уроков совпадает с уже опубликованным расписанием на ту же дату,
+    записывает в опубликованную версию только хэш нового файла и возвращает сообщение о том, что расписание
+    уже загружено. Если расписание на эту дату опубликовано, но отличается, записывает только изменения
+    в опубликованную версию.
+
+    Аргументы:
+        filename (str): Название файла, из которого берётся дата расписания.
+        content (bytes | BinaryIO): Содержимое файла или открытый двоичный файл.
+        progress (Callable[[str], Awaitable[Any]] | None): Функция отправки сообщений о ходе загрузки.
+
+    Возвращает:
+        Tuple[str, ParsedSchedule | None]: Сообщение о результате загрузки или ошибке и результат парсинга
+                                           или None, если файл уже загружен или его не удалось прочитать.
+    """
+    global _parsing_executor
+    loop = asyncio.get_running_loop()
+
+    # В процесс парсинга передаются только байты, файловые объекты не сериализуются
+    if not isinstance(content, bytes):
+        content = content.read()
+
+    # Повторная загрузка того же файла ничего не меняет
+    file_hash = hashlib.sha256(content).hexdigest()
+    try:
+        published_file_hash, published_lessons_hash = await get_published_hashes(schedule_date(filename))
+    except ValueError:
+        return 'Неверное название файла расписания!', None
+    except Exception as ex:
+        return f'Ошибка при чтении расписания из базы данных!\nОшибка:\n{ex}', None
+    if file_hash == published_file_hash:
+        return 'Расписание уже загружено', None
+
+    if progress is not None:
+        await progress('читаю файл расписания 📖')
+    try:
+        try:
+            schedule = await loop.run_in_executor(get_parsing_executor(), parse_schedule_file, filename, content)
+        except BrokenProcessPool:
+            # Процесс парсинга не запустился или упал, останавливаем сломанный пул и переходим на пул потоков
+            shutdown_parsing_executor()
+            _parsing_executor = ThreadPoolExecutor(max_workers=1)
+            schedule = await loop.run_in_executor(_parsing_executor, parse_schedule_file, filename, content)
+    except (zipfile.BadZipFile, KeyError, ValueError):
+        return 'Ошибка при чтении файла расписания!', None
+    except Exception as ex:
+        logging.error(ex)
+        return f'Ошибка при чтении файла расписания!\nОшибка:\n{ex}', None
+
+    if schedule.error is not None:
+        return schedule.error, schedule
+
+    # Файл изменился, но уроки в нём те же, запоминаем хэш нового файла, чтобы не парсить его повторно
+    schedule.file_hash = file_hash
+    if schedule.lessons_hash == published_lessons_hash:
+        await set_published_file_hash(schedule.date, file_hash)
+        return 'Расписание уже загружено', schedule
+
+    if progress is not None:
+        await progress(f'уроков прочитано: {len(schedule.regular_lessons) + len(schedule.uday_lessons)}, '
+                       f'сохраняю в бд 💾')
+
+    # Если расписание на эту дату уже опубликовано, записываем только изменения
+    version_id, live_regular, live_uday = await get_published_lessons(schedule.date)
+    if version_id is not None:
+        diff = diff_schedules(live_regular, live_uday, schedule.regular_lessons, schedule.uday_lessons, schedule.date)
+        if not (diff.classes or diff.uday_groups or diff.summaries):
+            await set_published_file_hash(schedule.date, file_hash)
+            return 'Расписание уже загружено', schedule
+        return await save_schedule_changes(schedule, version_id, diff), schedule
+
+    return await save_parsed_schedule(schedule), schedule
+
+
+async def save_schedule_changes(schedule: ParsedSchedule, version_id: int, diff: ScheduleDiff) -> str:
+    """
+    Записывает в опубликованную версию расписания только изменившиеся уроки и тексты расписания
+    и сохраняет описания изменений для уведомления затронутых пользователей.
+
+    Аргументы:
+        schedule (ParsedSchedule): Результат парсинга.
+        version_id (int): Идентификатор опубликованной версии.
+        diff (ScheduleDiff): Изменения нового расписания относительно опубликованного.
+
+    Возвращает:
+        str: Сообщение о результате сохранения изменений в базу данных.
+    """
+    try:
+        await update_published_schedule(version_id, schedule.date, diff, schedule.regular_lessons,
+                                        schedule.uday_lessons, schedule.rendered, file_hash=schedule.file_hash,
+                                        lessons_hash=schedule.lessons_hash)
+    except Exception as ex:
+        return f'Ошибка при сохранении расписания в базу данных!\nОшибка:\n{ex}'
+
+    schedule.changes = diff.summaries
+    return 'Расписание обновлено успешно!'
+
+
+async def notify_schedule_changes(bot: Bot, schedule: ParsedSchedule, day: str) -> None:
+    """
+    Уведомляет об изменениях в расписании только пользователей, чьи уроки изменились, отправляя
+    каждому описание изменений в его расписании. Заблокировавших бота пользователей удаляет из бд.
+
+    Аргументы:
+        bot (Bot): Объект бота для отправки сообщений.
+        schedule (ParsedSchedule): Результат парсинга с описаниями изменений.
+        day (str): День расписания для текста уведомления.
+
+    Возвращает:
+        None: Функция ничего не возвращает.
+    """
+    blocked_ids = []
+    class_letters = {class_letter for class_letter, _, _ in schedule.changes}
+    async for tg_id, class_letter, class_group, uday_group in iter_user_profiles(class_letters):
+        summary = schedule.changes.get(schedule_key(class_letter, class_group, uday_group, schedule.date))
+        if summary is None:
+            continue
+        try:
+            await bot.send_message(chat_id=tg_id, text=f'изменения в расписании на {day}🔄\n\n{summary}')
+        except TelegramForbiddenError:
+            blocked_ids.append(tg_id)
+
+        # Задержка для избежения нарушения ограничений телеграма
+        await asyncio.sleep(0.035)
+    await delete_users_bulk(blocked_ids)
 
-        return 'Расписание сохранено успешно!'
-    
 
 async def parse_schedule_from_eljur(today, tomorrow, bot: Bot):
     env_vars = dotenv_values(".env")
@@ -269,19 +488,30 @@ async def parse_schedule_from_eljur(today, tomorrow, bot: Bot):
                 schedule_file_url = obj.a['href']
                 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
                 schedule = session.get(url=schedule_file_url, headers=headers)
-                with open(f'./bot/uploads/{date}.xlsx', 'wb') as res:
-                    res.write(schedule.content)
-                parsing_result = Parser(f'{date}.xlsx').parse()                    
-                if parsing_result == 'Расписание сохранено успешно!':
-                    students = await get_all_users()
-                    for student_id in students:
+                parsing_result, parsed = await parse_schedule_async(f'{date}.xlsx', schedule.content)
+                if parsing_result in ('Расписание сохранено успешно!', 'Расписание обновлено успешно!'):
+                    # Заполняем кэш расписаний до рассылки, чтобы не нагружать бд запросами учеников
+                    await warm_up_schedule_cache(parsed.date)
+
+                    # При обновлении уведомляем только учеников, чьё расписание изменилось
+                    if parsed.changes is not None:
+                        await notify_schedule_changes(bot, parsed, 'завтра')
+                        return True
+
+                    blocked_ids = []
+                    async for student_id in iter_users():
                         try:
                             await bot.send_message(chat_id=student_id, text=f'загружено расписание на завтра🗓')
                         except TelegramForbiddenError:
-                            await delete_user(student_id)
+                            blocked_ids.append(student_id)
 
                         # Задержка для избежения нарушения ограничений телеграма
                         await asyncio.sleep(0.035)
+                    await delete_users_bulk(blocked_ids)
+                    return True
+
+                # Это расписание уже загружено, рассылка не нужна
+                elif parsing_result == 'Расписание уже загружено':
                     return True
 
             elif dt.datetime.strptime(date, '%d/%m') < today:
@@ -0,0 +1,86 @@
+from .lesson import Lesson
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from datetime import date
+
+
+def is_uday(class_letter: str, date: date) -> bool:
+    """
+    Проверяет, является ли дата универ-днём для класса: понедельник у 10-х классов и среда у 11-х.
+
+    Аргументы:
+        class_letter (str): Класс, например "10 Μ".
+        date (date): Дата расписания.
+
+    Возвращает:
+        bool: True, если в эту дату у класса универ-день, иначе False.
+    """
+    return (class_letter.startswith('10') and date.weekday() == 0
+            or class_letter.startswith('11') and date.weekday() == 2)
+
+
+def schedule_key(class_letter: str, class_group: int, uday_group: int, date: date) -> Tuple[str, int, int]:
+    """
+    Возвращает ключ готового расписания для пользователя.
+
+    В универ-день расписание не зависит от группы класса, в остальные дни - от группы универ-дня,
+    поэтому незначимая группа заменяется нулём.
+
+    Аргументы:
+        class_letter (str): Класс пользователя.
+        class_group (int): Группа класса пользователя.
+        uday_group (int): Группа универ-дня пользователя.
+        date (date): Дата расписания.
+
+    Возвращает:
+        Tuple[str, int, int]: Класс, группа класса и группа универ-дня.
+    """
+    if is_uday(class_letter, date):
+        return class_letter, 0, uday_group
+    return class_letter, class_group, 0
+
+
+def schedule_views(regular_lessons: List[Lesson], uday_lessons: List[Lesson],
+                   date: date) -> Dict[Tuple[str, int, int], List[str]]:
+    """
+    Составляет списки уроков, которые видит пользователь, для всех сочетаний класса и групп, встречающихся в уроках.
+
+    Аргументы:
+        regular_lessons (List[Lesson]): Список обычных уроков.
+        uday_lessons (List[Lesson]): Список уроков универ-дня.
+        date (date): Дата расписания.
+
+    Возвращает:
+        Dict[Tuple[str, int, int], List[str]]: Словарь с ключами из schedule_key и текстами уроков по порядку.
+    """
+    regular, uday = defaultdict(list), defaultdict(list)
+    for lesson in sorted(regular_lessons, key=lambda lesson: lesson.num):
+        regular[lesson.class_letter, lesson.group_num].append(lesson.info)
+    for lesson in sorted(uday_lessons, key=lambda lesson: lesson.num):
+        uday[lesson.group_num].append(lesson.info)
+
+    views = {}
+    for (class_letter, class_group), lessons in regular.items():
+        if is_uday(class_letter, date):
+            for uday_group, group_lessons in uday.items():
+                views[class_letter, 0, uday_group] = group_lessons + lessons
+        else:
+            views[class_letter, class_group, 0] = lessons
+    return views
+
+
+def render_schedules(regular_lessons: List[Lesson], uday_lessons: List[Lesson],
+                     date: date) -> Dict[Tuple[str, int, int], str]:
+    """
+    Составляет готовые тексты расписания для всех сочетаний класса и групп, встречающихся в уроках.
+
+    Аргументы:
+        regular_lessons (List[Lesson]): Список обычных уроков.
+        uday_lessons (List[Lesson]): Список уроков универ-дня.
+        date (date): Дата расписания.
+
+    Возвращает:
+        Dict[Tuple[str, int, int], str]: Словарь с ключами из schedule_key и текстами расписания.
+    """
+    return {key: '\n\n'.join(lessons) for key, lessons in schedule_views(regular_lessons, uday_lessons, date).items()}
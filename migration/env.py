@@ -5,13 +5,13 @@ from sqlalchemy import pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 from bot.db.models import *
-from bot.config import load_db_URL
+from bot.config import load_async_db_URL
 from alembic import context
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", 'postgresql+asyncpg' + load_db_URL())
+config.set_main_option("sqlalchemy.url", load_async_db_URL())
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -54,9 +54,18 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    is_sqlite = connection.dialect.name == 'sqlite'
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=is_sqlite)
 
     with context.begin_transaction():
+        # Early revisions rely on PostgreSQL-only ALTERs, so a fresh SQLite
+        # database is built from the models and stamped with the head revision;
+        # later revisions are written to run on both backends.
+        migration_context = context.get_context()
+        if is_sqlite and migration_context.get_current_revision() is None:
+            target_metadata.create_all(connection)
+            migration_context.stamp(context.script, 'head')
+            return
         context.run_migrations()
 
 
@@ -0,0 +1,78 @@
+"""schedule versions
+
+Revision ID: 7e3d1c5a9f42
+Revises: 20be77ba9bb9
+Create Date: 2026-10-18 11:02:17.384920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3d1c5a9f42'
+down_revision: Union[str, None] = '20be77ba9bb9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('schedule_versions',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_schedule_versions_date'), 'schedule_versions', ['date'], unique=False)
+    op.create_table('published_schedules',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('version_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['version_id'], ['schedule_versions.id'], ),
+    sa.PrimaryKeyConstraint('date')
+    )
+    op.add_column('regular_schedule', sa.Column('version_id', sa.Integer(), nullable=True))
+    op.add_column('uday_schedule', sa.Column('version_id', sa.Integer(), nullable=True))
+
+    # Уже загруженные расписания становятся первыми опубликованными версиями своих дат
+    op.execute('INSERT INTO schedule_versions (date) '
+               'SELECT date FROM regular_schedule UNION SELECT date FROM uday_schedule')
+    op.execute('INSERT INTO published_schedules (date, version_id) SELECT date, id FROM schedule_versions')
+    op.execute('UPDATE regular_schedule SET version_id = '
+               '(SELECT id FROM schedule_versions WHERE schedule_versions.date = regular_schedule.date)')
+    op.execute('UPDATE uday_schedule SET version_id = '
+               '(SELECT id FROM schedule_versions WHERE schedule_versions.date = uday_schedule.date)')
+
+    with op.batch_alter_table('regular_schedule') as batch_op:
+        batch_op.alter_column('version_id', existing_type=sa.Integer(), nullable=False)
+    with op.batch_alter_table('uday_schedule') as batch_op:
+        batch_op.alter_column('version_id', existing_type=sa.Integer(), nullable=False)
+    op.drop_index('ix_uday_schedule_date_group', table_name='uday_schedule')
+    op.drop_index('ix_regular_schedule_date_class', table_name='regular_schedule')
+    op.create_index('ix_regular_schedule_version_class', 'regular_schedule',
+                    ['version_id', 'class_letter', 'class_group', 'lesson_number'], unique=False,
+                    postgresql_include=['lesson_info'])
+    op.create_index('ix_uday_schedule_version_group', 'uday_schedule', ['version_id', 'uday_group', 'lesson_number'],
+                    unique=False, postgresql_include=['lesson_info'])
+
+
+def downgrade() -> None:
+    # Оставляем только опубликованные версии расписаний
+    op.execute('DELETE FROM regular_schedule WHERE version_id NOT IN (SELECT version_id FROM published_schedules)')
+    op.execute('DELETE FROM uday_schedule WHERE version_id NOT IN (SELECT version_id FROM published_schedules)')
+
+    op.drop_index('ix_uday_schedule_version_group', table_name='uday_schedule')
+    op.drop_index('ix_regular_schedule_version_class', table_name='regular_schedule')
+    op.create_index('ix_regular_schedule_date_class', 'regular_schedule',
+                    ['date', 'class_letter', 'class_group', 'lesson_number'], unique=False,
+                    postgresql_include=['lesson_info'])
+    op.create_index('ix_uday_schedule_date_group', 'uday_schedule', ['date', 'uday_group', 'lesson_number'],
+                    unique=False, postgresql_include=['lesson_info'])
+    with op.batch_alter_table('uday_schedule') as batch_op:
+        batch_op.drop_column('version_id')
+    with op.batch_alter_table('regular_schedule') as batch_op:
+        batch_op.drop_column('version_id')
+    op.drop_table('published_schedules')
+    op.drop_index(op.f('ix_schedule_versions_date'), table_name='schedule_versions')
+    op.drop_table('schedule_versions')
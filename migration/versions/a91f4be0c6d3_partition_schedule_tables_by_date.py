@@ -0,0 +1,103 @@
+"""partition schedule tables by date
+
+Revision ID: a91f4be0c6d3
+Revises: 7e3d1c5a9f42
+Create Date: 2026-10-18 12:41:55.207113
+
+"""
+from typing import Sequence, Union
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a91f4be0c6d3'
+down_revision: Union[str, None] = '7e3d1c5a9f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Таблица, её столбцы и индекс поиска уроков
+TABLES = {
+    'regular_schedule': (['lesson_number', 'lesson_info', 'date', 'version_id', 'class_letter', 'class_group'],
+                         'ix_regular_schedule_version_class',
+                         ['version_id', 'class_letter', 'class_group', 'lesson_number']),
+    'uday_schedule': (['lesson_number', 'lesson_info', 'date', 'version_id', 'uday_group'],
+                      'ix_uday_schedule_version_group',
+                      ['version_id', 'uday_group', 'lesson_number']),
+}
+
+
+def month_start(day: datetime.date, months_offset: int = 0) -> datetime.date:
+    months = day.year * 12 + day.month - 1 + months_offset
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+
+def specific_columns(table: str) -> list:
+    if table == 'regular_schedule':
+        return [sa.Column('class_letter', sa.String(length=5), nullable=False),
+                sa.Column('class_group', sa.Integer(), nullable=False)]
+    return [sa.Column('uday_group', sa.Integer(), nullable=False)]
+
+
+def move_to_old_name(table: str, index: str) -> None:
+    op.drop_index(index, table_name=table)
+    op.rename_table(table, f'{table}_old')
+    op.execute(f'ALTER INDEX {table}_pkey RENAME TO {table}_old_pkey')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq RENAME TO {table}_old_id_seq')
+
+
+def copy_from_old_name(table: str, columns: list, index: str, index_columns: list) -> None:
+    columns = ', '.join(['id'] + columns)
+    op.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_old')
+    op.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+               f"FROM {table}")
+    op.drop_table(f'{table}_old')
+    op.create_index(index, table, index_columns, unique=False, postgresql_include=['lesson_info'])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Встроенная бд SQLite не поддерживает партиционирование
+    if bind.dialect.name != 'postgresql':
+        return
+    for table, (columns, index, index_columns) in TABLES.items():
+        first_date = bind.execute(sa.text(f'SELECT MIN(date) FROM {table}')).scalar() or datetime.date.today()
+        move_to_old_name(table, index)
+        op.create_table(table,
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('lesson_number', sa.Integer(), nullable=False),
+        sa.Column('lesson_info', sa.Text(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('version_id', sa.Integer(), nullable=False),
+        *specific_columns(table),
+        sa.PrimaryKeyConstraint('id', 'date'),
+        postgresql_partition_by='RANGE (date)'
+        )
+
+        # Партиции на каждый месяц с уже загруженными расписаниями и на два месяца вперёд
+        start, last = month_start(first_date), month_start(datetime.date.today(), 2)
+        while start <= last:
+            end = month_start(start, 1)
+            op.execute(f"CREATE TABLE {table}_y{start.year}m{start.month:02} PARTITION OF {table} "
+                       f"FOR VALUES FROM ('{start}') TO ('{end}')")
+            start = end
+        copy_from_old_name(table, columns, index, index_columns)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, (columns, index, index_columns) in TABLES.items():
+        move_to_old_name(table, index)
+        op.create_table(table,
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('lesson_number', sa.Integer(), nullable=False),
+        sa.Column('lesson_info', sa.Text(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('version_id', sa.Integer(), nullable=False),
+        *specific_columns(table),
+        sa.PrimaryKeyConstraint('id')
+        )
+        copy_from_old_name(table, columns, index, index_columns)
@@ -0,0 +1,37 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from bot.db.broker import set_redis
+from bot.db.models import Base
+
+import bot.db.database as database_module
+
+import fakeredis
+import pytest
+
+
+@pytest.fixture
+async def redis():
+    """
+    Подменяет общий клиент Redis на экземпляр fakeredis на время теста.
+    """
+    client = fakeredis.FakeAsyncRedis()
+    set_redis(client)
+    yield client
+    set_redis(None)
+    await client.aclose()
+
+
+@pytest.fixture
+async def database(tmp_path, monkeypatch):
+    """
+    Подменяет общие движки основной бд и реплики на пустую бд SQLite во временном каталоге на время теста.
+    """
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path / "bot.db"}')
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+    for name, value in (('_async_engine', engine), ('_async_session_maker', session_maker),
+                        ('_replica_engine', engine), ('_replica_session_maker', session_maker)):
+        monkeypatch.setattr(database_module, name, value)
+    yield engine
+    await engine.dispose()
@@ -0,0 +1,145 @@
+from bot.db.broker import INVALIDATION_CHANNEL, acquire_job_lock, apply_invalidation, listen_invalidations
+from bot.db.broker import publish_invalidation
+from bot.db.cache import MISSING, users_cache, schedules_cache, admins_ids, published_dates
+from bot.middlewares.throttling import ThrottlingMiddleware
+
+from datetime import date
+
+import asyncio
+import pytest
+
+import bot.db.broker as broker
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    Очищает кэши и множества в памяти до и после каждого теста.
+    """
+    for cache in (users_cache, schedules_cache, admins_ids, published_dates):
+        cache.clear()
+    yield
+    for cache in (users_cache, schedules_cache, admins_ids, published_dates):
+        cache.clear()
+
+
+async def start_listener(redis, **kwargs) -> asyncio.Task:
+    """
+    Запускает получение сообщений об инвалидации и дожидается подписки на канал.
+    """
+    listener = asyncio.create_task(listen_invalidations(**kwargs))
+    for _ in range(100):
+        if (await redis.pubsub_numsub(INVALIDATION_CHANNEL))[0][1]:
+            return listener
+        await asyncio.sleep(0.01)
+    raise TimeoutError('listener did not subscribe')
+
+
+async def wait_for(condition) -> None:
+    """
+    Ждёт выполнения условия не дольше секунды.
+    """
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError
+
+
+async def test_listener_applies_messages_of_other_processes(redis):
+    users_cache.set(1, 'user')
+    listener = await start_listener(redis)
+    try:
+        await redis.publish(INVALIDATION_CHANNEL, 'other-process:user:1')
+        await wait_for(lambda: users_cache.cache.get(1, MISSING) is MISSING)
+    finally:
+        listener.cancel()
+
+
+async def test_listener_skips_own_messages(redis):
+    users_cache.set(1, 'user')
+    users_cache.set(2, 'user')
+    listener = await start_listener(redis)
+    try:
+        await publish_invalidation('user', 1)
+        await redis.publish(INVALIDATION_CHANNEL, 'other-process:user:2')
+        await wait_for(lambda: users_cache.cache.get(2, MISSING) is MISSING)
+        assert users_cache.cache.get(1) == 'user'
+    finally:
+        listener.cancel()
+
+
+async def test_publish_without_redis_does_nothing():
+    await publish_invalidation('user', 1)
+
+
+def test_apply_admin_invalidation_adds_and_removes():
+    apply_invalidation('admin', 'add:5')
+    assert 5 in admins_ids
+    apply_invalidation('admin', 'remove:5')
+    assert 5 not in admins_ids
+
+
+def test_apply_published_and_deleted_invalidation():
+    day = date(2025, 9, 1)
+    schedules_cache.set((day, '10 А', 0, 1), 'text')
+    schedules_cache.set((date(2025, 9, 2), '10 А', 0, 1), 'text')
+    apply_invalidation('published', day.isoformat())
+    assert day in published_dates
+    assert schedules_cache.cache.get((day, '10 А', 0, 1), MISSING) is MISSING
+
+    published_dates.add(date(2025, 9, 2))
+    apply_invalidation('deleted', date(2025, 9, 2).isoformat())
+    assert not published_dates
+    assert not schedules_cache.cache
+
+
+async def test_job_lock_is_taken_by_one_process(redis, monkeypatch):
+    assert await acquire_job_lock('parse_schedule')
+    monkeypatch.setattr(broker, '_instance_id', 'other-process')
+    assert not await acquire_job_lock('parse_schedule')
+    assert await acquire_job_lock('maintain_schedule_storage')
+
+
+async def test_job_lock_without_redis_always_runs():
+    assert await acquire_job_lock('parse_schedule')
+    assert await acquire_job_lock('parse_schedule')
+
+
+async def test_throttling_counter_is_shared_between_processes(redis):
+    first, second = ThrottlingMiddleware(), ThrottlingMiddleware()
+    assert await first.count_request(1) == 0
+    assert await second.count_request(1) == 1
+    assert await first.count_request(1) == 2
+    assert 0 < await redis.ttl('throttling:1') <= 4
+
+
+async def test_listener_resyncs_after_reconnect(redis, monkeypatch):
+    monkeypatch.setattr(broker, 'LISTEN_RETRY_DELAY', 0)
+    pubsub, calls = redis.pubsub, []
+
+    def broken_pubsub():
+        # Первое подключение обрывается, второе проходит
+        if not calls:
+            calls.append('failed')
+            raise ConnectionError('connection lost')
+        return pubsub()
+
+    async def on_reconnect():
+        calls.append('resynced')
+
+    monkeypatch.setattr(redis, 'pubsub', broken_pubsub)
+    users_cache.set(1, 'user')
+    listener = await start_listener(redis, on_reconnect=on_reconnect)
+    try:
+        await wait_for(lambda: 'resynced' in calls)
+        assert users_cache.cache.get(1, MISSING) is MISSING
+    finally:
+        listener.cancel()
+
+
+def test_apply_user_invalidation_for_several_users():
+    for tg_id in (1, 2, 3):
+        users_cache.set(tg_id, 'user')
+    apply_invalidation('user', '1,3')
+    assert set(users_cache.cache) == {2}
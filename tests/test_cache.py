@@ -0,0 +1,52 @@
+from bot.db.cache import MISSING, CountingCache
+
+import time
+
+
+def test_get_counts_hits_and_misses():
+    cache = CountingCache(maxsize=10, ttl=60)
+    assert cache.get(1) is MISSING
+    cache.set(1, 'user')
+    assert cache.get(1) == 'user'
+    assert cache.get(1) == 'user'
+    assert cache.stats() == {'size': 1, 'hits': 2, 'misses': 1, 'hit_rate': 2 / 3}
+
+
+def test_none_is_cached_as_a_value():
+    cache = CountingCache(maxsize=10, ttl=60)
+    cache.set(1, None)
+    assert cache.get(1) is None
+    assert cache.stats()['hits'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = CountingCache(maxsize=2, ttl=60)
+    cache.set(1, 'first')
+    cache.set(2, 'second')
+    cache.get(1)
+    cache.set(3, 'third')
+    assert cache.get(2) is MISSING
+    assert cache.get(1) == 'first'
+    assert cache.get(3) == 'third'
+
+
+def test_entries_expire_after_ttl():
+    cache = CountingCache(maxsize=10, ttl=0.05)
+    cache.set(1, 'user')
+    time.sleep(0.06)
+    assert cache.get(1) is MISSING
+
+
+def test_invalidate_and_invalidate_matching():
+    cache = CountingCache(maxsize=10, ttl=60)
+    for key in ((1, 'a'), (1, 'b'), (2, 'a')):
+        cache.set(key, 'text')
+    cache.invalidate((2, 'a'))
+    cache.invalidate((3, 'a'))
+    assert cache.get((2, 'a')) is MISSING
+    cache.invalidate_matching(lambda key: key[0] == 1)
+    assert cache.stats()['size'] == 0
+
+
+def test_stats_of_unused_cache():
+    assert CountingCache(maxsize=10, ttl=60).stats()['hit_rate'] == 0.0
@@ -0,0 +1,57 @@
+from bot.misc.diff import diff_schedules, summarize_changes
+from bot.misc.lesson import Lesson
+
+from datetime import date
+
+
+TUESDAY, WEDNESDAY = date(2025, 9, 2), date(2025, 9, 3)
+
+
+def lesson(num: int, info: str, group: int, class_letter: str | None = '11 А', day: date = TUESDAY) -> Lesson:
+    """
+    Создаёт урок 11 А класса во вторник, если не указаны другой класс и дата.
+    """
+    return Lesson(num, info, day, group, class_letter)
+
+
+def test_summary_lists_new_and_changed_lessons_and_cancelled_times():
+    old = ['8:30\nалгебра', '9:20\nфизика', '10:10\nхимия']
+    new = ['8:30\nгеометрия', '10:10\nхимия', '11:00\nистория']
+    assert summarize_changes(old, new) == '8:30\nгеометрия\n\n11:00\nистория\n\nотменено: 9:20'
+
+
+def test_summary_of_reordered_lessons():
+    assert summarize_changes(['8:30\nалгебра', '9:20\nфизика'], ['9:20\nфизика', '8:30\nалгебра']) == \
+        'изменён порядок уроков'
+
+
+def test_unchanged_schedule_has_empty_diff():
+    regular = [lesson(1, '8:30\nалгебра', 1), lesson(2, '9:20\nфизика', 2)]
+    diff = diff_schedules(regular, [], list(reversed(regular)), [], TUESDAY)
+    assert not (diff.classes or diff.uday_groups or diff.summaries)
+
+
+def test_diff_reports_only_changed_class_groups():
+    old = [lesson(1, '8:30\nалгебра', 1), lesson(1, '8:30\nфизика', 2), lesson(1, '8:30\nхимия', 1, '11 Б')]
+    new = [lesson(1, '8:30\nгеометрия', 1), lesson(1, '8:30\nфизика', 2), lesson(1, '8:30\nхимия', 1, '11 Б')]
+    diff = diff_schedules(old, [], new, [], TUESDAY)
+    assert diff.classes == {('11 А', 1)}
+    assert diff.uday_groups == set()
+    assert diff.summaries == {('11 А', 1, 0): '8:30\nгеометрия'}
+
+
+def test_uday_change_affects_every_class_of_the_parallel():
+    regular = [lesson(3, '12:00\nалгебра', 0, '11 А', WEDNESDAY), lesson(3, '12:00\nхимия', 0, '11 Б', WEDNESDAY)]
+    old_uday = [lesson(1, '8:30\nлекция', 1, None, WEDNESDAY), lesson(1, '8:30\nсеминар', 2, None, WEDNESDAY)]
+    new_uday = [lesson(1, '8:30\nпрактикум', 1, None, WEDNESDAY), lesson(1, '8:30\nсеминар', 2, None, WEDNESDAY)]
+    diff = diff_schedules(regular, old_uday, regular, new_uday, WEDNESDAY)
+    assert diff.classes == set()
+    assert diff.uday_groups == {1}
+    assert set(diff.summaries) == {('11 А', 0, 1), ('11 Б', 0, 1)}
+
+
+def test_removed_group_is_reported_as_cancelled():
+    old = [lesson(1, '8:30\nалгебра', 1), lesson(1, '8:30\nфизика', 2)]
+    diff = diff_schedules(old, [], old[:1], [], TUESDAY)
+    assert diff.classes == {('11 А', 2)}
+    assert diff.summaries == {('11 А', 2, 0): 'отменено: 8:30'}
@@ -0,0 +1,69 @@
+from bot.misc.grid import GRID_MAX_COL, GRID_MAX_ROW, SheetGrid, load_sheet_grids, read_merged_ranges
+
+from io import BytesIO
+
+import openpyxl
+import pytest
+
+
+@pytest.fixture
+def workbook_bytes() -> bytes:
+    """
+    Эксель файл из двух страниц с объединёнными клетками, в том числе выходящими за область расписания.
+    """
+    workbook = openpyxl.Workbook()
+    first = workbook.active
+    first.title = '10'
+    first['A1'] = 'время'
+    first['B2'] = 'алгебра'
+    first.merge_cells('B2:C3')
+    first['D15'] = 'физика'
+    first.merge_cells('D15:D20')
+    first['AC1'] = 'вне области'
+    second = workbook.create_sheet('11')
+    second['A1'] = 'химия'
+    second.merge_cells('A1:B1')
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_from_rows_propagates_merged_values():
+    grid = SheetGrid.from_rows('10', [('a', None, None), (None, None, 'b')], [(1, 1, 2, 2), (3, 1, 3, 1)])
+    assert grid.column(1, 1, 2) == ['a', 'a']
+    assert grid.column(2, 1, 2) == ['a', 'a']
+    assert grid.value(2, 3) == 'b'
+    assert grid.value(1, 3) is None
+
+
+def test_from_rows_clips_ranges_to_the_grid():
+    grid = SheetGrid.from_rows('10', [('a',)], [(1, 1, GRID_MAX_COL + 5, GRID_MAX_ROW + 5)])
+    assert grid.value(GRID_MAX_ROW, GRID_MAX_COL) == 'a'
+    assert (GRID_MAX_ROW + 1, 1) not in grid.values
+    assert len(grid.values) == GRID_MAX_ROW * GRID_MAX_COL
+
+
+def test_iter_cols_matches_columns():
+    grid = SheetGrid.from_rows('10', [(1, 2), (3, 4)], [])
+    assert list(grid.iter_cols(1, 1, 2, 2)) == [[1, 3], [2, 4]]
+
+
+def test_read_merged_ranges(workbook_bytes):
+    merged_ranges = read_merged_ranges(BytesIO(workbook_bytes))
+    assert {title: sorted(ranges) for title, ranges in merged_ranges.items()} == {'10': [(2, 2, 3, 3), (4, 15, 4, 20)],
+                                                                                  '11': [(1, 1, 2, 1)]}
+
+
+@pytest.mark.parametrize('read_only', [True, False])
+def test_load_sheet_grids(workbook_bytes, read_only):
+    first, second = load_sheet_grids(workbook_bytes, read_only=read_only)
+    assert (first.title, second.title) == ('10', '11')
+    assert first.value(3, 3) == 'алгебра'
+    assert first.column(4, 15, 16) == ['физика', 'физика']
+    assert first.value(1, 29) is None
+    assert second.value(1, 2) == 'химия'
+
+
+def test_streaming_and_full_modes_give_same_grids(workbook_bytes):
+    streamed, full = load_sheet_grids(workbook_bytes), load_sheet_grids(workbook_bytes, read_only=False)
+    assert [grid.values for grid in streamed] == [grid.values for grid in full]
@@ -0,0 +1,51 @@
+from bot.db.metrics import QueryStats, get_query_stats, record_query, reset_query_stats
+
+from collections import deque
+
+import logging
+import pytest
+
+import bot.db.metrics as metrics
+
+
+@pytest.fixture(autouse=True)
+def clear_stats():
+    """
+    Сбрасывает статистику запросов после каждого теста.
+    """
+    yield
+    reset_query_stats()
+
+
+def test_percentile_of_no_samples():
+    assert QueryStats.percentile(deque(), 95) == 0.0
+
+
+@pytest.mark.parametrize('percent, expected', [(50, 51), (95, 96), (99, 100), (100, 100)])
+def test_percentile_in_milliseconds(percent, expected):
+    samples = deque(value / 1000 for value in range(100, 0, -1))
+    assert QueryStats.percentile(samples, percent) == pytest.approx(expected)
+
+
+def test_window_keeps_only_last_samples():
+    stats = QueryStats(window=2)
+    for latency in (10.0, 0.001, 0.002):
+        stats.record(latency, 0.0, False)
+    assert stats.calls == 3
+    assert stats.snapshot()['p99_ms'] == pytest.approx(2)
+
+
+def test_record_query_counts_calls_and_errors():
+    record_query('get_user', 0.001, 0.0, False, (1,), {})
+    record_query('get_user', 0.002, 0.001, True, (1,), {})
+    snapshot = get_query_stats()['get_user']
+    assert (snapshot['calls'], snapshot['errors']) == (2, 1)
+    assert snapshot['checkout_p95_ms'] == pytest.approx(1)
+
+
+def test_slow_query_log_truncates_arguments(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, '_slow_query_threshold', 0)
+    with caplog.at_level(logging.WARNING, logger='bot.db.metrics'):
+        record_query('delete_users_bulk', 0.001, 0.0, False, (list(range(10000)),), {'text': 'x' * 10000})
+    assert 'delete_users_bulk' in caplog.text
+    assert len(caplog.text) < 500
@@ -0,0 +1,96 @@
+from bot.misc.parsing import ParsedSchedule, hash_lessons, parse_schedule_async, schedule_date
+from bot.misc.parsing import shutdown_parsing_executor
+from bot.db.requests import get_published_hashes, publish_schedule
+from bot.db.cache import published_dates, schedules_cache
+from bot.misc.lesson import Lesson
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import hashlib
+import pytest
+
+import bot.misc.parsing as parsing
+
+
+DAY = date(date.today().year, 9, 2)
+REGULAR = [Lesson(1, '8:30\nалгебра', DAY, 1, '10 А'), Lesson(2, '9:20\nфизика', DAY, 1, '10 А')]
+UDAY = [Lesson(1, '8:30\nлекция', DAY, 2)]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    Очищает кэши в памяти после каждого теста.
+    """
+    yield
+    published_dates.clear()
+    schedules_cache.clear()
+
+
+@pytest.fixture
+def parsed_lessons(monkeypatch):
+    """
+    Подменяет парсинг файла: любой файл содержит уроки REGULAR и UDAY, парсинг выполняется в пуле потоков.
+    """
+    def parse_file(filename, content):
+        return ParsedSchedule(date=schedule_date(filename), regular_lessons=REGULAR, uday_lessons=UDAY,
+                              rendered={}, lessons_hash=hash_lessons(REGULAR, UDAY))
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(parsing, 'parse_schedule_file', parse_file)
+    monkeypatch.setattr(parsing, 'get_parsing_executor', lambda: executor)
+    yield
+    executor.shutdown()
+
+
+def test_hash_does_not_depend_on_lesson_order():
+    assert hash_lessons(REGULAR, UDAY) == hash_lessons(list(reversed(REGULAR)), UDAY)
+
+
+def test_hash_changes_with_lessons():
+    changed = [REGULAR[0], Lesson(2, '9:20\nхимия', DAY, 1, '10 А')]
+    assert hash_lessons(REGULAR, UDAY) != hash_lessons(changed, UDAY)
+    assert hash_lessons(REGULAR, UDAY) != hash_lessons(REGULAR, [])
+
+
+def test_hash_separates_regular_and_uday_lessons():
+    lesson = Lesson(1, '8:30\nлекция', DAY, 2, '10 А')
+    assert hash_lessons([lesson], []) != hash_lessons([], [lesson])
+
+
+async def test_same_file_is_not_parsed_again(database, parsed_lessons, monkeypatch):
+    await publish_schedule(DAY, REGULAR, UDAY, {}, file_hash=hashlib.sha256(b'file').hexdigest(),
+                           lessons_hash=hash_lessons(REGULAR, UDAY))
+    monkeypatch.setattr(parsing, 'parse_schedule_file', None)
+    assert await parse_schedule_async(DAY.strftime('%d.%m.xlsx'), b'file') == ('Расписание уже загружено', None)
+
+
+async def test_new_file_with_same_lessons_stores_its_hash(database, parsed_lessons):
+    lessons_hash = hash_lessons(REGULAR, UDAY)
+    await publish_schedule(DAY, REGULAR, UDAY, {}, file_hash=hashlib.sha256(b'old').hexdigest(),
+                           lessons_hash=lessons_hash)
+    result, _ = await parse_schedule_async(DAY.strftime('%d.%m.xlsx'), b'new')
+    assert result == 'Расписание уже загружено'
+    assert await get_published_hashes(DAY) == (hashlib.sha256(b'new').hexdigest(), lessons_hash)
+
+
+async def test_wrong_file_name_is_reported(database):
+    assert await parse_schedule_async('расписание.xlsx', b'file') == ('Неверное название файла расписания!', None)
+
+
+async def test_broken_file_is_reported(database, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(parsing, 'get_parsing_executor', lambda: executor)
+    result, schedule = await parse_schedule_async(DAY.strftime('%d.%m.xlsx'), b'not a zip file')
+    executor.shutdown()
+    assert result == 'Ошибка при чтении файла расписания!'
+    assert schedule is None
+
+
+async def test_process_pool_reports_broken_file(database):
+    try:
+        result, _ = await parse_schedule_async(DAY.strftime('%d.%m.xlsx'), b'not a zip file')
+    finally:
+        shutdown_parsing_executor()
+    assert result == 'Ошибка при чтении файла расписания!'
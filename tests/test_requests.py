@@ -0,0 +1,120 @@
+from sqlalchemy import event, insert
+
+from bot.db.requests import get_user, get_user_schedule, iter_user_profiles, iter_users, publish_schedule, set_user
+from bot.db.models import User
+from bot.db.cache import published_dates, schedules_cache, users_cache
+from bot.db.database import mark_recent_write
+from bot.misc.lesson import Lesson
+
+from datetime import date
+
+import pytest
+
+import bot.db.requests as requests
+
+
+MONDAY, TUESDAY = date(2025, 9, 1), date(2025, 9, 2)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    Очищает кэши в памяти после каждого теста.
+    """
+    yield
+    published_dates.clear()
+    schedules_cache.clear()
+    users_cache.clear()
+
+
+async def publish_day(day: date) -> None:
+    """
+    Публикует расписание двух групп 10 А и двух групп универ-дня на дату.
+    """
+    regular = [Lesson(num, f'{day} 10 А гр. {group} урок {num}', day, group, '10 А')
+               for group in (0, 1) for num in (2, 1)]
+    uday = [Lesson(num, f'{day} универ гр. {group} урок {num}', day, group) for group in (1, 2) for num in (2, 1)]
+    await publish_schedule(day, regular, uday, {})
+
+
+async def test_user_schedule_on_regular_day(database):
+    await publish_day(TUESDAY)
+    assert await get_user_schedule('10 А', 1, 2, TUESDAY) == [f'{TUESDAY} 10 А гр. 1 урок 1',
+                                                              f'{TUESDAY} 10 А гр. 1 урок 2']
+
+
+async def test_user_schedule_on_uday_starts_with_uday_lessons(database):
+    await publish_day(MONDAY)
+    assert await get_user_schedule('10 А', 1, 2, MONDAY) == [f'{MONDAY} универ гр. 2 урок 1',
+                                                             f'{MONDAY} универ гр. 2 урок 2',
+                                                             f'{MONDAY} 10 А гр. 0 урок 1',
+                                                             f'{MONDAY} 10 А гр. 0 урок 2']
+
+
+async def test_user_schedule_reads_only_published_version(database):
+    await publish_day(TUESDAY)
+    await publish_schedule(TUESDAY, [Lesson(1, 'новый урок', TUESDAY, 1, '10 А')], [], {})
+    assert await get_user_schedule('10 А', 1, 2, TUESDAY) == ['новый урок']
+    assert await get_user_schedule('10 Б', 1, 2, date(2025, 9, 3)) == []
+
+
+async def test_user_schedule_is_one_query(database):
+    await publish_day(MONDAY)
+    statements = []
+    event.listen(database.sync_engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    await get_user_schedule('10 А', 1, 2, MONDAY)
+    assert len(statements) == 1
+
+
+async def test_get_user_caches_unregistered_user(database):
+    assert await get_user(7) is None
+    assert users_cache.cache[7] is None
+    await set_user(7, '10 А', 1, 2)
+    assert (await get_user(7)).class_letter == '10 А'
+
+
+async def test_get_user_skips_caching_read_that_raced_with_change(database, monkeypatch):
+    async def fetch_during_change(tg_id):
+        # Другой процесс изменил пользователя, пока шло чтение с реплики
+        mark_recent_write(tg_id)
+        return None
+
+    monkeypatch.setattr(requests, 'fetch_user', fetch_during_change)
+    assert await get_user(8) is None
+    assert 8 not in users_cache.cache
+
+
+async def register_users(database, users) -> None:
+    """
+    Записывает пользователей в бд одним запросом.
+    """
+    async with database.begin() as connection:
+        await connection.execute(insert(User), [{'id': tg_id, 'class_letter': class_letter, 'class_group': 1,
+                                                 'uday_group': 2} for tg_id, class_letter in users])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 500])
+async def test_iter_users_returns_every_user_once_in_id_order(database, chunk_size):
+    await register_users(database, [(5, '10 А'), (1, '11 Б'), (3, '10 Б'), (2, '10 А'), (4, '11 А'), (6, '10 А')])
+    assert [tg_id async for tg_id in iter_users(chunk_size=chunk_size)] == [1, 2, 3, 4, 5, 6]
+    assert [tg_id async for tg_id in iter_users('10', chunk_size=chunk_size)] == [2, 3, 5, 6]
+
+
+async def test_iter_users_reads_each_page_in_its_own_query(database):
+    await register_users(database, [(tg_id, '10 А') for tg_id in range(1, 6)])
+    statements = []
+    event.listen(database.sync_engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    assert len([tg_id async for tg_id in iter_users(chunk_size=2)]) == 5
+    assert len(statements) == 3
+
+
+async def test_iter_users_of_empty_table(database):
+    assert [tg_id async for tg_id in iter_users()] == []
+
+
+async def test_iter_user_profiles_filters_classes(database):
+    await register_users(database, [(3, '10 А'), (1, '10 Б'), (2, '11 А')])
+    profiles = [profile async for profile in iter_user_profiles(iter(['10 А', '11 А']), chunk_size=1)]
+    assert profiles == [(2, '11 А', 1, 2), (3, '10 А', 1, 2)]